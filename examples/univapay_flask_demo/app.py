@@ -1,14 +1,19 @@
 from __future__ import annotations
+import atexit
 import os
 import json
 import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 
 from flask import (
     Flask, render_template, request, jsonify, g, redirect, url_for, abort, flash, Response, session
 )
 from dotenv import load_dotenv
+from werkzeug.exceptions import BadRequest
 
 # Load environment variables for the app (.env in this folder)
 load_dotenv()
@@ -23,10 +28,10 @@ from univapay import (
     UnivapayConfig, UnivapayClient,
     ChargesAPI, SubscriptionsAPI, RefundsAPI, CancelsAPI, TokensAPI,
     build_one_time_widget_config, build_subscription_widget_config, build_recurring_widget_config,
-    make_idempotency_key, safe_metadata, UnivapayHTTPError,
+    make_idempotency_key, safe_metadata, UnivapayHTTPError, widget_to_json,
 )
 # Webhook helpers (signature verification is optional; enabled if secret is present)
-from univapay.resources import parse_event, WebhookVerificationError
+from univapay.resources import parse_event, verify_signature, WebhookVerificationError
 
 # -------------------- Flask setup --------------------
 app = Flask(__name__, static_folder="static", template_folder="templates")
@@ -210,15 +215,23 @@ def widget_checkout_js():
         return Response(f"// Failed to fetch widget from {src}: {e}", mimetype="application/javascript", status=502)
 
 # -------------------- SDK Config --------------------
+_SDK_SETTING_KEYS = (
+    "UNIVAPAY_JWT", "UNIVAPAY_SECRET", "UNIVAPAY_STORE_ID",
+    "UNIVAPAY_BASE_URL", "UNIVAPAY_TIMEOUT", "UNIVAPAY_DEBUG",
+)
+_SDK_SETTINGS_SQL = "SELECT key, value FROM settings WHERE key IN ({})".format(",".join("?" * len(_SDK_SETTING_KEYS)))
+
 def make_config() -> UnivapayConfig:
-    # Use DB settings first, then env
+    # Use DB settings first, then env (all keys fetched in one query)
+    try:
+        stored = {row["key"]: row["value"] for row in get_db().execute(_SDK_SETTINGS_SQL, _SDK_SETTING_KEYS)}
+    except Exception:
+        stored = {}
+
     def _get(k: str, default: Optional[str] = None) -> Optional[str]:
-        try:
-            row = get_db().execute("SELECT value FROM settings WHERE key=?", (k,)).fetchone()
-            if row and row["value"]:
-                return row["value"]
-        except Exception:
-            pass
+        val = stored.get(k)
+        if val:
+            return val
         return os.getenv(k, default) if default is not None else os.getenv(k)
 
     cfg = UnivapayConfig(
@@ -233,17 +246,76 @@ def make_config() -> UnivapayConfig:
     return cfg
 
 
+# One pooled client per distinct config; rebuilding httpx.Client per request
+# would pay a fresh TCP/TLS handshake to the API on every call. Settings edits
+# create new configs, so only the most recent few clients are kept: older ones
+# are closed on eviction and the rest when the process exits.
+_CLIENTS_MAX = 4
+_CLIENTS: "OrderedDict[tuple, UnivapayClient]" = OrderedDict()
+_CLIENTS_LOCK = threading.Lock()
+
+def get_client(cfg: UnivapayConfig, *, retries: int = 1) -> UnivapayClient:
+    key = (cfg.jwt, cfg.secret, cfg.store_id, cfg.base_url, cfg.timeout, retries)
+    evicted = []
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is not None:
+            _CLIENTS.move_to_end(key)
+            return client
+        client = _CLIENTS[key] = UnivapayClient(cfg, retries=retries)
+        while len(_CLIENTS) > _CLIENTS_MAX:
+            evicted.append(_CLIENTS.popitem(last=False)[1])
+    log("SDK client created", {"retries": retries, "pooled": len(_CLIENTS), "evicted": len(evicted)})
+    for old in evicted:
+        old.close()
+    return client
+
+@atexit.register
+def _close_clients() -> None:
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
 # -------------------- request logging --------------------
+def _req_json() -> Dict[str, Any]:
+    """
+    Parsed JSON body, decoded at most once per request and kept on `g`.
+    Malformed JSON raises BadRequest (400), as get_json(force=True) always did.
+    """
+    if "req_json" not in g:
+        g.req_json = request.get_json(force=True) or {}
+    return g.req_json
+
 @app.before_request
 def _log_request():
-    # light logging of incoming requests (no bodies unless JSON)
-    args = dict(request.args)
-    log(f"{request.method} {request.path}", {"args": args})
+    # light logging of incoming requests (no bodies unless JSON);
+    # skip copying args/parsing bodies entirely when debug output is off
+    if not APP_DEBUG:
+        return
+    log(f"{request.method} {request.path}", {"args": request.args.to_dict()})
     if request.is_json:
         try:
-            log("JSON body", {"json": request.get_json(silent=True)})
-        except Exception:
-            pass
+            log("JSON body", {"json": _req_json()})
+        except BadRequest:
+            log("JSON body", {"json": "<malformed>"})  # the route itself answers 400
+
+
+# -------------------- JSON responses --------------------
+def _json_response(body: Union[str, bytes]) -> Response:
+    # SDK models serialize straight to JSON (pydantic-core); skip jsonify's dict walk
+    return app.response_class(body, mimetype="application/json")
+
+
+# -------------------- API error handling --------------------
+@app.errorhandler(UnivapayHTTPError)
+def _univapay_http_error(e: UnivapayHTTPError):
+    # Surface API errors with their 4xx/5xx code (network errors have status -1 -> 502)
+    log("Univapay API error", {"path": request.path, "status": e.status, "code": e.code, "message": e.message_text})
+    status = e.status if 400 <= e.status <= 599 else 502
+    return jsonify({"ok": False, "status": e.status, "code": e.code, "message": e.message_text}), status
 
 
 # -------------------- Routes --------------------
@@ -400,6 +472,39 @@ def healthz():
 
 
 # --------------- Widget config endpoints ---------------
+_WIDGET_KINDS = ("one_time", "subscription", "recurring")
+
+@lru_cache(maxsize=1024)
+def _widget_config_json(
+    kind: str,
+    amount: int,
+    period: Optional[str],
+    form_id: str,
+    button_id: str,
+    description: str,
+    extra_raw: Optional[str],
+) -> str:
+    """
+    Widget envelopes are a pure function of these parameters, so keep the
+    serialized JSON for repeat requests (e.g. every page view of a product).
+    """
+    extra: Dict[str, Any] = {}
+    if extra_raw:
+        try:
+            extra = json.loads(extra_raw)
+        except Exception:
+            extra = {}
+
+    common = dict(amount=amount, form_id=form_id, button_id=button_id, description=description,
+                  payment_methods=extra)
+    if kind == "one_time":
+        payload = build_one_time_widget_config(**common)
+    elif kind == "subscription":
+        payload = build_subscription_widget_config(period=period, **common)
+    else:
+        payload = build_recurring_widget_config(**common)
+    return widget_to_json(payload)
+
 @app.get("/api/widget-config")
 def widget_config():
     """
@@ -418,38 +523,19 @@ def widget_config():
     description = request.args.get("description", f"{kind} payment")
     period = request.args.get("period")
     extra_raw = request.args.get("gateways")
-    extra: Dict[str, Any] = {}
-    if extra_raw:
-        try:
-            extra = json.loads(extra_raw)
-        except Exception:
-            extra = {}
 
     log("Widget config request", {
         "kind": kind, "amount": amount, "period": period,
-        "form_id": form_id, "button_id": button_id, "extra": extra
+        "form_id": form_id, "button_id": button_id, "gateways": extra_raw
     })
 
-    # Build envelope using SDK (uses UNIVAPAY_JWT from env)
-    if kind == "one_time":
-        payload = build_one_time_widget_config(
-            amount=amount, form_id=form_id, button_id=button_id, description=description, payment_methods=extra
-        )
-    elif kind == "subscription":
-        if not period:
-            abort(400, "period is required for subscription")
-        payload = build_subscription_widget_config(
-            amount=amount, period=period, form_id=form_id, button_id=button_id, description=description, payment_methods=extra
-        )
-    elif kind == "recurring":
-        payload = build_recurring_widget_config(
-            amount=amount, form_id=form_id, button_id=button_id, description=description, payment_methods=extra
-        )
-    else:
+    if kind not in _WIDGET_KINDS:
         abort(400, "invalid type")
+    if kind == "subscription" and not period:
+        abort(400, "period is required for subscription")
 
-    log("Widget config response (truncated appId)", {"appId": payload.get("appId", "")[:10] + "..."})
-    return jsonify(payload)
+    # Build envelope using SDK (uses UNIVAPAY_JWT from env); cached per parameter set
+    return _json_response(_widget_config_json(kind, amount, period, form_id, button_id, description, extra_raw))
 
 
 @app.get("/api/widget-config/sku/<sku>")
@@ -472,33 +558,15 @@ def widget_config_by_sku(sku: str):
     currency = (row["currency"] or "jpy").lower()
     period = row["period"]
     extra_raw = request.args.get("gateways")
-    extra: Dict[str, Any] = {}
-    if extra_raw:
-        try:
-            extra = json.loads(extra_raw)
-        except Exception:
-            extra = {}
 
     log("Widget-by-SKU", {"sku": sku, "kind": kind, "amount": amount, "currency": currency, "period": period})
 
-    if kind == "one_time":
-        payload = build_one_time_widget_config(
-            amount=amount, form_id=form_id, button_id=button_id, description=description, payment_methods=extra
-        )
-    elif kind == "subscription":
-        if not period:
-            abort(400, "Product missing period for subscription")
-        payload = build_subscription_widget_config(
-            amount=amount, period=period, form_id=form_id, button_id=button_id, description=description, payment_methods=extra
-        )
-    elif kind == "recurring":
-        payload = build_recurring_widget_config(
-            amount=amount, form_id=form_id, button_id=button_id, description=description, payment_methods=extra
-        )
-    else:
+    if kind not in _WIDGET_KINDS:
         abort(400, "invalid product kind")
+    if kind == "subscription" and not period:
+        abort(400, "Product missing period for subscription")
 
-    return jsonify(payload)
+    return _json_response(_widget_config_json(kind, amount, period, form_id, button_id, description, extra_raw))
 
 
 # --------------- Server-side actions ---------------
@@ -508,7 +576,7 @@ def create_charge():
     Create a (one-time or recurring) charge using a token id.
     Body JSON: { tokenId, amount, currency="jpy", capture=true, metadata? }
     """
-    data = request.get_json(force=True) or {}
+    data = _req_json()
     log("POST /api/charges", {"body": data})
 
     token_id = data.get("tokenId")
@@ -521,13 +589,14 @@ def create_charge():
 
     cfg = make_config()
     idem = make_idempotency_key("one_time")
-    with UnivapayClient(cfg, retries=1) as c:
-        charges = ChargesAPI(c)
-        ch = charges.create_one_time(
-            token_id=token_id, amount=amount, currency=currency, capture=capture, metadata=metadata, idempotency_key=idem
-        )
+    c = get_client(cfg, retries=1)
+    charges = ChargesAPI(c)
+    ch = charges.create_one_time(
+        token_id=token_id, amount=amount, currency=currency, capture=capture, metadata=metadata, idempotency_key=idem
+    )
 
     # Store minimal record
+    ch_json = ch.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO charges (id,status,amount,currency,token_id,created_on,json) VALUES (?,?,?,?,?,?,?)",
@@ -538,22 +607,22 @@ def create_charge():
             getattr(ch, "effective_currency", None),
             getattr(ch, "transaction_token_id", None),
             getattr(ch, "created_on", None),
-            json.dumps(ch.model_dump(), ensure_ascii=False),
+            ch_json,
         ),
     )
     db.commit()
     log("Charge created", {"id": ch.id, "status": getattr(ch, "status", None)})
-    return jsonify(ch.model_dump())
+    return _json_response(ch_json)
 
 
 @app.get("/api/charges/<charge_id>")
 def get_charge(charge_id: str):
     polling = (request.args.get("polling") or "").lower() in ("1", "true", "yes")
     cfg = make_config()
-    with UnivapayClient(cfg, retries=1) as c:
-        charges = ChargesAPI(c)
-        ch = charges.get(charge_id, polling=polling)
-    return jsonify(ch.model_dump())
+    c = get_client(cfg, retries=1)
+    charges = ChargesAPI(c)
+    # Pure passthrough: forward the API body without parsing/validating it
+    return _json_response(charges.get_raw(charge_id, polling=polling))
 
 
 @app.post("/api/subscriptions")
@@ -562,7 +631,7 @@ def create_subscription():
     Create a subscription using a token id.
     Body JSON: { tokenId, amount, period, currency="jpy", metadata? }
     """
-    data = request.get_json(force=True) or {}
+    data = _req_json()
     log("POST /api/subscriptions", {"body": data})
 
     token_id = data.get("tokenId")
@@ -575,33 +644,34 @@ def create_subscription():
 
     cfg = make_config()
     idem = make_idempotency_key("sub_create")
-    with UnivapayClient(cfg, retries=1) as c:
-        subs = SubscriptionsAPI(c)
-        s = subs.create(token_id=token_id, amount=amount, period=period, currency=currency, metadata=metadata, idempotency_key=idem)
+    c = get_client(cfg, retries=1)
+    subs = SubscriptionsAPI(c)
+    s = subs.create(token_id=token_id, amount=amount, period=period, currency=currency, metadata=metadata, idempotency_key=idem)
 
     # Persist
+    s_json = s.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO subscriptions (id,status,amount,currency,period,token_id,created_on,json) VALUES (?,?,?,?,?,?,?,?)",
         (
             s.id, getattr(s, "status", None), getattr(s, "amount", None), getattr(s, "currency", None),
             getattr(s, "period", None), getattr(s, "transaction_token_id", None), getattr(s, "created_on", None),
-            json.dumps(s.model_dump(), ensure_ascii=False)
+            s_json
         ),
     )
     db.commit()
     log("Subscription created", {"id": s.id, "status": getattr(s, "status", None)})
-    return jsonify(s.model_dump())
+    return _json_response(s_json)
 
 
 @app.get("/api/subscriptions/<subscription_id>")
 def get_subscription(subscription_id: str):
     polling = (request.args.get("polling") or "").lower() in ("1", "true", "yes")
     cfg = make_config()
-    with UnivapayClient(cfg, retries=1) as c:
-        subs = SubscriptionsAPI(c)
-        s = subs.get(subscription_id, polling=polling)
-    return jsonify(s.model_dump())
+    c = get_client(cfg, retries=1)
+    subs = SubscriptionsAPI(c)
+    s = subs.get(subscription_id, polling=polling)
+    return _json_response(s.model_dump_json())
 
 
 @app.post("/api/subscriptions/<subscription_id>/cancel")
@@ -610,16 +680,17 @@ def cancel_subscription(subscription_id: str):
     Cancel a subscription and persist the updated resource.
     """
     cfg = make_config()
-    with UnivapayClient(cfg, retries=1) as c:
-        subs = SubscriptionsAPI(c)
-        s = subs.cancel(subscription_id)
-        # Follow-up fetch with polling to capture latest status if it changes asynchronously
-        try:
-            s = subs.get(subscription_id, polling=True)
-        except Exception:
-            pass
+    c = get_client(cfg, retries=1)
+    subs = SubscriptionsAPI(c)
+    s = subs.cancel(subscription_id)
+    # Follow-up fetch with polling to capture latest status if it changes asynchronously
+    try:
+        s = subs.get(subscription_id, polling=True)
+    except Exception:
+        pass
 
     # Persist updated row (including any schedule/termination hints in JSON)
+    s_json = s.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO subscriptions (id,status,amount,currency,period,token_id,created_on,json) VALUES (?,?,?,?,?,?,?,?)",
@@ -631,17 +702,17 @@ def cancel_subscription(subscription_id: str):
             getattr(s, "period", None),
             getattr(s, "transaction_token_id", None),
             getattr(s, "created_on", None),
-            json.dumps(s.model_dump(), ensure_ascii=False),
+            s_json,
         ),
     )
     db.commit()
     log("Subscription canceled", {"id": s.id, "status": getattr(s, "status", None)})
-    return jsonify(s.model_dump())
+    return _json_response(s_json)
 
 
 @app.post("/api/refunds/<charge_id>")
 def refund_charge(charge_id: str):
-    data = request.get_json(force=True) or {}
+    data = _req_json()
     log("POST /api/refunds/<charge_id>", {"charge_id": charge_id, "body": data})
 
     amount = data.get("amount")
@@ -661,33 +732,29 @@ def refund_charge(charge_id: str):
         pass
 
     cfg = make_config()
-    try:
-        with UnivapayClient(cfg, retries=1) as c:
-            refunds = RefundsAPI(c)
-            payload_extra = {}
-            # Include currency only for partial refunds when we have it
-            if isinstance(amount, int) and currency_for_refund:
-                payload_extra["currency"] = currency_for_refund.upper()
-            if isinstance(reason, str) and reason.strip():
-                payload_extra["reason"] = reason.strip()
-            r = refunds.create(
-                charge_id,
-                amount=amount if isinstance(amount, int) else None,
-                **payload_extra,
-            )
-    except UnivapayHTTPError as e:
-        # Surface API error to client with 4xx/5xx code
-        log("Refund API error", {"status": e.status, "code": e.code, "message": e.message_text})
-        return jsonify({"ok": False, "status": e.status, "code": e.code, "message": e.message_text}), int(e.status)
+    c = get_client(cfg, retries=1)
+    refunds = RefundsAPI(c)
+    payload_extra = {}
+    # Include currency only for partial refunds when we have it
+    if isinstance(amount, int) and currency_for_refund:
+        payload_extra["currency"] = currency_for_refund.upper()
+    if isinstance(reason, str) and reason.strip():
+        payload_extra["reason"] = reason.strip()
+    r = refunds.create(
+        charge_id,
+        amount=amount if isinstance(amount, int) else None,
+        **payload_extra,
+    )
     # Save
+    r_json = r.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO refunds (id,charge_id,amount,status,created_on,json) VALUES (?,?,?,?,?,?)",
-        (r.id, charge_id, getattr(r, "amount", None), getattr(r, "status", None), getattr(r, "created_on", None), json.dumps(r.model_dump(), ensure_ascii=False)),
+        (r.id, charge_id, getattr(r, "amount", None), getattr(r, "status", None), getattr(r, "created_on", None), r_json),
     )
     db.commit()
     log("Refund created", {"refund_id": r.id, "charge_id": charge_id})
-    return jsonify(r.model_dump())
+    return _json_response(r_json)
 
 
 @app.get("/api/refunds/<charge_id>/<refund_id>")
@@ -698,11 +765,12 @@ def get_refund(charge_id: str, refund_id: str):
     """
     polling = (request.args.get("polling") or "1").lower() in ("1", "true", "yes")
     cfg = make_config()
-    with UnivapayClient(cfg, retries=1) as c:
-        refunds = RefundsAPI(c)
-        r = refunds.get(charge_id=charge_id, refund_id=refund_id, polling=polling)
+    c = get_client(cfg, retries=1)
+    refunds = RefundsAPI(c)
+    r = refunds.get(charge_id=charge_id, refund_id=refund_id, polling=polling)
 
     # Persist latest state
+    r_json = r.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO refunds (id,charge_id,amount,status,created_on,json) VALUES (?,?,?,?,?,?)",
@@ -712,21 +780,22 @@ def get_refund(charge_id: str, refund_id: str):
             getattr(r, "amount", None),
             getattr(r, "status", None),
             getattr(r, "created_on", None),
-            json.dumps(r.model_dump(), ensure_ascii=False),
+            r_json,
         ),
     )
     db.commit()
     log("Refund refreshed", {"refund_id": r.id, "status": getattr(r, "status", None)})
-    return jsonify(r.model_dump())
+    return _json_response(r_json)
 
 
 @app.post("/api/cancels/<charge_id>")
 def cancel_charge(charge_id: str):
     cfg = make_config()
-    with UnivapayClient(cfg, retries=1) as c:
-        cancels = CancelsAPI(c)
-        ch = cancels.cancel_charge(charge_id)
+    c = get_client(cfg, retries=1)
+    cancels = CancelsAPI(c)
+    ch = cancels.cancel_charge(charge_id)
     # update local
+    ch_json = ch.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO charges (id,status,amount,currency,token_id,created_on,json) VALUES (?,?,?,?,?,?,?)",
@@ -737,22 +806,22 @@ def cancel_charge(charge_id: str):
             getattr(ch, "effective_currency", None),
             getattr(ch, "transaction_token_id", None),
             getattr(ch, "created_on", None),
-            json.dumps(ch.model_dump(), ensure_ascii=False),
+            ch_json,
         ),
     )
     db.commit()
     log("Charge canceled", {"id": ch.id, "status": getattr(ch, "status", None)})
-    return jsonify(ch.model_dump())
+    return _json_response(ch_json)
 
 
 @app.get("/api/tokens/<token_id>")
 def get_token(token_id: str):
     cfg = make_config()
-    with UnivapayClient(cfg, retries=0) as c:
-        tokens = TokensAPI(c)
-        t = tokens.get(token_id)
+    c = get_client(cfg, retries=0)
+    tokens = TokensAPI(c)
+    t = tokens.get(token_id)
     log("Token fetched", {"id": token_id, "type": getattr(t, "token_type", None)})
-    return jsonify(t.model_dump())
+    return _json_response(t.model_dump_json())
 
 
 @app.post("/api/ingest/charge/<charge_id>")
@@ -763,11 +832,12 @@ def ingest_charge(charge_id: str):
     log("POST /api/ingest/charge/<charge_id>", {"charge_id": charge_id})
 
     cfg = make_config()
-    with UnivapayClient(cfg, retries=1) as c:
-        charges = ChargesAPI(c)
-        ch = charges.get(charge_id, polling=True)
+    c = get_client(cfg, retries=1)
+    charges = ChargesAPI(c)
+    ch = charges.get(charge_id, polling=True)
     
     # Store/update in local DB
+    ch_json = ch.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO charges (id,status,amount,currency,token_id,created_on,json) VALUES (?,?,?,?,?,?,?)",
@@ -778,12 +848,12 @@ def ingest_charge(charge_id: str):
             getattr(ch, "effective_currency", None),
             getattr(ch, "transaction_token_id", None),
             getattr(ch, "created_on", None),
-            json.dumps(ch.model_dump(), ensure_ascii=False),
+            ch_json,
         ),
     )
     db.commit()
     log("Charge ingested", {"id": ch.id, "status": getattr(ch, "status", None)})
-    return jsonify(ch.model_dump())
+    return _json_response(ch_json)
 
 
 @app.post("/api/ingest/subscription/<subscription_id>")
@@ -794,65 +864,82 @@ def ingest_subscription(subscription_id: str):
     log("POST /api/ingest/subscription/<subscription_id>", {"subscription_id": subscription_id})
 
     cfg = make_config()
-    with UnivapayClient(cfg, retries=1) as c:
-        subs = SubscriptionsAPI(c)
-        s = subs.get(subscription_id, polling=True)
+    c = get_client(cfg, retries=1)
+    subs = SubscriptionsAPI(c)
+    s = subs.get(subscription_id, polling=True)
     
     # Store/update in local DB
+    s_json = s.model_dump_json()
     db = get_db()
     db.execute(
         "INSERT OR REPLACE INTO subscriptions (id,status,amount,currency,period,token_id,created_on,json) VALUES (?,?,?,?,?,?,?,?)",
         (
             s.id, getattr(s, "status", None), getattr(s, "amount", None), getattr(s, "currency", None),
             getattr(s, "period", None), getattr(s, "transaction_token_id", None), getattr(s, "created_on", None),
-            json.dumps(s.model_dump(), ensure_ascii=False)
+            s_json
         ),
     )
     db.commit()
     log("Subscription ingested", {"id": s.id, "status": getattr(s, "status", None)})
-    return jsonify(s.model_dump())
+    return _json_response(s_json)
 
 
 # --------------- Webhook ---------------
+# Webhook replies are fixed, so encode them once instead of jsonify() per event
+_WEBHOOK_OK_BODY = json.dumps({"ok": True, "verified": True}).encode("utf-8")
+_WEBHOOK_ERRORS: Dict[str, tuple] = {
+    key: (json.dumps({"ok": False, "error": msg}).encode("utf-8"), status)
+    for key, msg, status in (
+        ("misconfigured", "server misconfigured: UNIVAPAY_WEBHOOK_SECRET missing", 500),
+        ("signature", "signature verification failed", 400),
+        ("payload", "invalid payload", 400),
+    )
+}
+
+def _webhook_error(key: str) -> Response:
+    body, status = _WEBHOOK_ERRORS[key]
+    return Response(body, status=status, mimetype="application/json")
+
 @app.post("/webhook/univapay")
 def webhook():
     raw_body = request.data  # bytes
-    headers = {k: v for k, v in request.headers.items()}
     # Always verify in real mode; if secret is missing, fail fast
     if not WEBHOOK_SECRET:
-        return jsonify({"ok": False, "error": "server misconfigured: UNIVAPAY_WEBHOOK_SECRET missing"}), 500
+        return _webhook_error("misconfigured")
 
+    # Signature and payload failures are reported separately; storage errors below
     try:
-        ev = parse_event(
-            body=raw_body,
-            headers=headers,
+        verify_signature(
+            payload=raw_body,
+            headers=request.headers,  # werkzeug Headers is already a mapping; no copy needed
             secret=WEBHOOK_SECRET,
-            skip_verification=False,
         )
-        payload = ev.data  # original JSON
-        etype = ev.type
-        rtype = ev.resource_type
-        created_on = ev.created_on or ev.created
+    except WebhookVerificationError as e:
+        log("Webhook signature failed", {"error": str(e)})
+        return _webhook_error("signature")
+    try:
+        # signature checked above; only decode here
+        ev = parse_event(body=raw_body, headers=request.headers, skip_verification=True)
+    except Exception as e:
+        log("Webhook payload invalid", {"error": repr(e)})
+        return _webhook_error("payload")
 
+    etype = ev.type
+    rtype = ev.resource_type
+    created_on = ev.created_on or ev.created
+    try:
         db = get_db()
         db.execute(
             "INSERT INTO events (type,resource_type,created_on,payload_json) VALUES (?,?,?,?)",
-            (
-                etype,
-                rtype,
-                created_on,
-                json.dumps(payload, ensure_ascii=False),
-            ),
+            # the verified body already is the original JSON; store it as-is
+            (etype, rtype, created_on, raw_body.decode("utf-8", errors="replace")),
         )
         db.commit()
-        log("Webhook stored", {"type": etype, "resource": rtype, "verified": True})
-        return jsonify({"ok": True, "verified": True})
-    except WebhookVerificationError as e:
-        log("Webhook signature failed", {"error": str(e)})
-        return jsonify({"ok": False, "error": "signature verification failed"}), 400
     except Exception as e:
         log("Webhook error", {"error": repr(e)})
-        return jsonify({"ok": False, "error": "invalid payload"}), 400
+        return _webhook_error("payload")
+    log("Webhook stored", {"type": etype, "resource": rtype, "verified": True})
+    return Response(_WEBHOOK_OK_BODY, mimetype="application/json")
 
 
 # -------------------- Simple views to trigger API actions --------------------
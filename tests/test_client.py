@@ -0,0 +1,240 @@
+import datetime
+import json
+import time
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from univapay._idem_store import SQLiteIdempotencyStore
+from univapay.client import UnivapayClient, _IdempotencyCache
+from univapay.config import UnivapayConfig
+from univapay.errors import UnivapayBatchError, UnivapayHTTPError, UnivapaySDKError
+from univapay.resources.charges import ChargesAPI
+from univapay.resources.subscriptions import SubscriptionsAPI
+
+
+def _client(handler, **kwargs):
+    cfg = UnivapayConfig(jwt="jwt", secret="secret", store_id="st_1", base_url="https://api.test")
+    http = httpx.Client(base_url=cfg.base_url, transport=httpx.MockTransport(handler))
+    return UnivapayClient(cfg, http_client=http, **kwargs)
+
+
+class Recorder:
+    """MockTransport handler answering every call with a new charge id."""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        return httpx.Response(201, json={"id": f"ch_{len(self.requests)}"})
+
+
+def test_store_does_not_persist_auto_keys(tmp_path):
+    rec = Recorder()
+    store = SQLiteIdempotencyStore(str(tmp_path / "idem.db"))
+    client = _client(rec, idempotency_cache_ttl_s=0.01, idempotency_store=store)
+
+    assert client.post("/charges", json={"amount": 100})["id"] == "ch_1"
+    time.sleep(0.02)  # cache TTL expired: an identical call is a new payment
+    assert client.post("/charges", json={"amount": 100})["id"] == "ch_2"
+    assert len(rec.requests) == 2
+
+
+def test_store_replays_caller_key(tmp_path):
+    rec = Recorder()
+    store = SQLiteIdempotencyStore(str(tmp_path / "idem.db"))
+    client = _client(rec, idempotency_store=store)
+
+    first = client.post("/charges", json={"amount": 100}, idempotency_key="order-1")
+    again = client.post("/charges", json={"amount": 100}, idempotency_key="order-1")
+    assert first["id"] == again["id"] == "ch_1"
+    assert len(rec.requests) == 1
+
+
+def test_store_rejects_key_reuse_with_different_body(tmp_path):
+    rec = Recorder()
+    store = SQLiteIdempotencyStore(str(tmp_path / "idem.db"))
+    client = _client(rec, idempotency_store=store)
+
+    client.post("/charges", json={"amount": 100}, idempotency_key="order-1")
+    with pytest.raises(UnivapaySDKError):
+        client.post("/charges", json={"amount": 999}, idempotency_key="order-1")
+    assert len(rec.requests) == 1
+
+
+def test_cache_serves_identical_call_without_network():
+    rec = Recorder()
+    client = _client(rec, idempotency_cache_ttl_s=60)
+
+    first = client.post("/charges", json={"amount": 100})
+    again = client.post("/charges", json={"amount": 100})
+    assert first["id"] == again["id"] == "ch_1"
+    assert len(rec.requests) == 1
+    assert rec.requests[0].headers["Idempotency-Key"].startswith("auto-")
+
+
+def test_cache_entry_expires_after_ttl():
+    rec = Recorder()
+    client = _client(rec, idempotency_cache_ttl_s=0.01)
+
+    client.post("/charges", json={"amount": 100})
+    time.sleep(0.02)
+    assert client.post("/charges", json={"amount": 100})["id"] == "ch_2"
+    assert len(rec.requests) == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = _IdempotencyCache(maxsize=2, ttl_s=60)
+    cache.put("a", {"id": "a"})
+    cache.put("b", {"id": "b"})
+    assert cache.get("a") == {"id": "a"}  # refreshes "a"
+    cache.put("c", {"id": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": "a"}
+    assert cache.get("c") == {"id": "c"}
+
+
+def test_random_keys_bypass_cache_when_disabled():
+    rec = Recorder()
+    client = _client(rec)
+
+    client.post("/charges", json={"amount": 100})
+    client.post("/charges", json={"amount": 100})
+    keys = [r.headers["Idempotency-Key"] for r in rec.requests]
+    assert len(keys) == 2 and keys[0] != keys[1]
+    assert not any(k.startswith("auto-") for k in keys)
+
+
+def test_get_raw_returns_body_bytes_unchanged():
+    body = b'{"id":"ch_1","amount":  100}'
+    client = _client(lambda request: httpx.Response(200, content=body))
+    assert client.get_raw("/charges/ch_1") == body
+
+
+def test_get_raw_raises_on_error_status():
+    client = _client(lambda request: httpx.Response(404, json={"code": "NOT_FOUND"}))
+    with pytest.raises(UnivapayHTTPError) as exc:
+        client.get_raw("/charges/missing")
+    assert exc.value.status == 404
+
+
+def test_close_leaves_injected_http_client_open():
+    client = _client(Recorder())
+    client.close()
+    assert not client._client.is_closed
+
+
+def test_close_closes_owned_http_client():
+    cfg = UnivapayConfig(jwt="jwt", secret="secret", base_url="https://api.test")
+    client = UnivapayClient(cfg)
+    client.close()
+    assert client._client.is_closed
+
+
+@pytest.mark.parametrize(
+    "value, error",
+    [
+        (Decimal("1.5"), TypeError),
+        ({"a"}, TypeError),
+        (datetime.datetime(2025, 1, 2, 3, 4, 5), TypeError),
+        (float("nan"), ValueError),
+    ],
+)
+def test_request_body_rejects_non_json_values(value, error):
+    rec = Recorder()
+    client = _client(rec)
+    with pytest.raises(error):
+        client.post("/charges", json={"amount": 100, "metadata": {"x": value}})
+    assert rec.requests == []
+
+
+def test_request_body_is_compact_utf8_json():
+    rec = Recorder()
+    client = _client(rec)
+    client.post("/charges", json={"amount": 100, "description": "テスト"})
+    assert rec.requests[0].content == '{"amount":100,"description":"テスト"}'.encode()
+
+
+def _echo_amount(request):
+    amount = json.loads(request.content)["amount"]
+    if amount == 13:
+        return httpx.Response(402, json={"code": "CARD_DECLINED"})
+    body = {"id": f"ch_{amount}", "amount": amount, "headers": dict(request.headers)}
+    return httpx.Response(201, json=body)
+
+
+def test_create_many_keeps_item_order_and_prefixes_keys():
+    charges = ChargesAPI(_client(_echo_amount))
+    items = [{"token_id": "tok", "amount": a} for a in (10, 20, 30, 40)]
+    items[2]["idempotency_key"] = "own-key"
+
+    results = charges.create_many(items, concurrency=3, idempotency_prefix="batch")
+    assert [c.id for c in results] == ["ch_10", "ch_20", "ch_30", "ch_40"]
+    keys = [c.model_extra["headers"]["idempotency-key"] for c in results]
+    assert keys == ["batch-0", "batch-1", "own-key", "batch-3"]
+
+
+def test_create_many_return_exceptions():
+    charges = ChargesAPI(_client(_echo_amount))
+    items = [{"token_id": "tok", "amount": a} for a in (10, 13, 30)]
+
+    results = charges.create_many(
+        items, concurrency=2, idempotency_prefix="b", return_exceptions=True
+    )
+    assert results[0].id == "ch_10" and results[2].id == "ch_30"
+    assert isinstance(results[1], UnivapayHTTPError) and results[1].status == 402
+
+
+def test_create_many_failure_reports_every_item():
+    rec = []
+
+    def handler(request):
+        rec.append(request)
+        return _echo_amount(request)
+
+    charges = ChargesAPI(_client(handler))
+    items = [{"token_id": "tok", "amount": a} for a in (13, 20, 30)]
+
+    with pytest.raises(UnivapayBatchError) as exc:
+        charges.create_many(items, concurrency=2, idempotency_prefix="b")
+    assert len(rec) == 3  # the other items still ran
+    assert exc.value.failed == [0]
+    assert [r.id for r in exc.value.results[1:]] == ["ch_20", "ch_30"]
+    assert isinstance(exc.value.__cause__, UnivapayHTTPError)
+
+
+def test_create_many_requires_idempotency_keys():
+    rec = Recorder()
+    charges = ChargesAPI(_client(rec))
+    with pytest.raises(ValueError):
+        charges.create_many([{"token_id": "tok", "amount": 10}, {"token_id": "tok", "amount": 20}])
+    assert rec.requests == []
+
+    own = [{"token_id": "tok", "amount": 10, "idempotency_key": "k1"}]
+    assert charges.create_many(own)[0].id == "ch_1"
+
+
+@pytest.mark.parametrize("start_on", [datetime.date(2025, 1, 1), 20250101])
+def test_subscription_create_rejects_non_string_start_on(start_on):
+    rec = Recorder()
+    subs = SubscriptionsAPI(_client(rec))
+    with pytest.raises(ValueError, match="start_on"):
+        subs.create(token_id="tok", amount=100, period="monthly", start_on=start_on)
+    assert rec.requests == []
+
+
+def test_subscription_create_strips_start_on():
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(201, json={"id": "sub_1", **sent[-1]})
+
+    sub = SubscriptionsAPI(_client(handler)).create(
+        token_id="tok", amount=100, period="monthly", start_on=" 2025-01-01 "
+    )
+    assert sent[0]["start_on"] == "2025-01-01"
+    assert sub.id == "sub_1"
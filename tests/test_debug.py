@@ -0,0 +1,44 @@
+import httpx
+import pytest
+
+from univapay import debug
+from univapay.client import UnivapayClient
+from univapay.config import UnivapayConfig
+from univapay.resources import charges as charges_mod
+from univapay.resources import refunds as refunds_mod
+from univapay.resources.charges import ChargesAPI
+from univapay.resources.refunds import RefundsAPI
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    """Record resource dprint/djson calls; restores the debug flag afterwards."""
+    calls = []
+    for mod in (charges_mod, refunds_mod):
+        monkeypatch.setattr(mod, "dprint", lambda *a: calls.append(a))
+        monkeypatch.setattr(mod, "djson", lambda *a: calls.append(a))
+    monkeypatch.setattr(debug, "DEBUG_ENABLED", debug.DEBUG_ENABLED)
+    return calls
+
+
+def _client():
+    cfg = UnivapayConfig(jwt="jwt", secret="secret", store_id="st_1", base_url="https://api.test")
+    body = {"id": "x_1", "status": "successful"}
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=body))
+    return UnivapayClient(cfg, http_client=httpx.Client(base_url=cfg.base_url, transport=transport))
+
+
+def test_resource_logs_are_skipped_with_debug_off(logged):
+    debug.set_debug(False)
+    client = _client()
+
+    ChargesAPI(client).wait_until_terminal("ch_1", server_polling=False, timeout_s=1)
+    ChargesAPI(client).refund("ch_1", amount=100)
+    RefundsAPI(client).list("ch_1")
+    assert logged == []
+
+
+def test_resource_logs_are_emitted_with_debug_on(logged):
+    debug.set_debug(True)
+    ChargesAPI(_client()).get("ch_1")
+    assert ("charges.get() charge_id=ch_1 polling=False",) in logged
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from univapay.errors import UnivapayHTTPError
+from univapay.resources import charges as charges_mod
+from univapay.resources import refunds as refunds_mod
+from univapay.resources import subscriptions as subscriptions_mod
+from univapay.resources._polling import _PollScheduler, observed_get
+from univapay.resources.charges import ChargesAPI
+from univapay.resources.refunds import RefundsAPI
+from univapay.resources.subscriptions import SubscriptionsAPI
+
+
+class FakeClient:
+    """Stands in for UnivapayClient: the charge turns `final` after `settle_s` seconds."""
+
+    def __init__(
+        self, *, settle_s=0.0, final="successful", base_url="https://api.test", throttle=()
+    ):
+        self.config = SimpleNamespace(base_url=base_url, store_id="st_1")
+        self.settle_at = time.monotonic() + settle_s
+        self.final = final
+        self.throttle = set(throttle)  # call numbers answered with a 429
+        self.calls = 0
+
+    def _path(self, resource):
+        return f"/stores/{self.config.store_id}/{resource}"
+
+    def get(self, path, *, polling=False):
+        self.calls += 1
+        if self.calls in self.throttle:
+            raise UnivapayHTTPError(429, {"code": "TOO_MANY_REQUESTS"}, retry_after=0.01)
+        status = self.final if time.monotonic() >= self.settle_at else "pending"
+        resource_id = path.rsplit("/", 1)[-1]
+        return {
+            "id": resource_id,
+            "status": status,
+            "amount": 100,
+            "currency": "jpy",
+            "period": "monthly",
+        }
+
+
+def _wait_kwargs(timeout_s):
+    return dict(
+        server_polling=False, timeout_s=timeout_s, interval_s=0.05, max_interval_s=0.05, jitter=False
+    )
+
+
+def test_coalesced_follower_keeps_polling_past_leader_timeout():
+    client = FakeClient(settle_s=0.4, base_url="https://coalesce-sync.test")
+    charges = ChargesAPI(client)
+    results = {}
+
+    def wait(name, timeout_s):
+        results[name] = charges.wait_until_terminal("ch_1", **_wait_kwargs(timeout_s))
+
+    leader = threading.Thread(target=wait, args=("leader", 0.15))
+    leader.start()
+    time.sleep(0.05)  # join while the leader is polling
+    follower = threading.Thread(target=wait, args=("follower", 3))
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert results["leader"].status == "pending"
+    assert results["follower"].status == "successful"
+
+
+def test_coalesced_async_follower_keeps_polling_past_leader_timeout():
+    client = FakeClient(settle_s=0.4, base_url="https://coalesce-async.test")
+    charges = ChargesAPI(client)
+
+    async def main():
+        leader = asyncio.ensure_future(charges.await_until_terminal("ch_1", **_wait_kwargs(0.15)))
+        await asyncio.sleep(0.05)
+        follower = charges.await_until_terminal("ch_1", **_wait_kwargs(3))
+        return await asyncio.gather(leader, follower)
+
+    leader, follower = asyncio.run(main())
+    assert leader.status == "pending"
+    assert follower.status == "successful"
+
+
+def _await_terminal(api, client):
+    if api is RefundsAPI:
+        return api(client).await_until_terminal("ch_1", "re_1", **_wait_kwargs(3))
+    return api(client).await_until_terminal("x_1", **_wait_kwargs(3))
+
+
+@pytest.mark.parametrize(
+    "api, final",
+    [(ChargesAPI, "successful"), (RefundsAPI, "successful"), (SubscriptionsAPI, "current")],
+)
+def test_await_until_terminal_returns_terminal_status(api, final):
+    client = FakeClient(settle_s=0.1, final=final, base_url=f"https://await-{api.__name__}.test")
+    result = asyncio.run(_await_terminal(api, client))
+    assert result.status == final
+    assert client.calls > 1
+
+
+def test_await_until_terminal_returns_last_status_on_timeout():
+    client = FakeClient(settle_s=60, base_url="https://await-timeout.test")
+    started = time.monotonic()
+    result = asyncio.run(ChargesAPI(client).await_until_terminal("ch_1", **_wait_kwargs(0.2)))
+    assert result.status == "pending"
+    assert time.monotonic() - started < 1
+
+
+def test_await_until_terminal_keeps_polling_through_429():
+    client = FakeClient(settle_s=0.1, base_url="https://await-429.test", throttle=(2, 3))
+    result = asyncio.run(ChargesAPI(client).await_until_terminal("ch_1", **_wait_kwargs(3)))
+    assert result.status == "successful"
+    assert client.calls > 3
+
+
+def test_scheduler_widens_delay_on_429_and_narrows_on_success():
+    sched = _PollScheduler()
+    assert sched.next_delay("k", 1.0) == 1.0
+
+    sched.observe("k", 429)
+    sched.observe("k", 429)
+    assert sched.next_delay("k", 1.0) == 4.0
+    assert sched.throttle_rate("k") > 0
+
+    for _ in range(20):
+        sched.observe("k", 200)
+    assert sched.next_delay("k", 1.0) == 1.0
+
+
+def test_scheduler_caps_multiplier_and_honours_retry_after():
+    sched = _PollScheduler()
+    for _ in range(10):
+        sched.observe("k", 429)
+    assert sched.next_delay("k", 1.0) == 32.0
+
+    sched.observe("other", 429, retry_after=5)
+    assert 4.5 < sched.next_delay("other", 0.1) <= 5
+
+
+def test_scheduler_ignores_success_for_unknown_key():
+    sched = _PollScheduler()
+    sched.observe("k", 200)
+    assert sched.throttle_rate("k") == 0.0
+    assert sched.next_delay("k", 0.5) == 0.5
+
+
+def test_observed_get_turns_429_into_none_and_reraises_other_errors():
+    def throttled():
+        raise UnivapayHTTPError(429, {})
+
+    def missing():
+        raise UnivapayHTTPError(404, {})
+
+    assert observed_get("observed-get.test", throttled) is None
+    with pytest.raises(UnivapayHTTPError):
+        observed_get("observed-get.test", missing)
+    assert observed_get("observed-get.test", lambda: "ok") == "ok"
+
+
+@pytest.mark.parametrize("status", [None, "", 3, 1.5, ["successful"], {"s": "successful"}, True])
+def test_is_terminal_ignores_non_string_status(status):
+    for mod in (charges_mod, refunds_mod, subscriptions_mod):
+        assert mod._is_terminal(status) is False
@@ -0,0 +1,35 @@
+from decimal import Decimal, InvalidOperation
+
+import pytest
+
+from univapay.utils import from_minor_units, to_minor_units
+
+
+@pytest.mark.parametrize(
+    "amount, currency, minor",
+    [
+        (Decimal("12.34"), "usd", 1234),
+        (Decimal("12.345"), "usd", 1235),
+        (Decimal("1E+3"), "jpy", 1000),
+        (Decimal("12"), "kwd", 12000),
+        ("0.5", "jpy", 1),
+        (12, "usd", 1200),
+    ],
+)
+def test_to_minor_units(amount, currency, minor):
+    assert to_minor_units(amount, currency) == minor
+
+
+def test_to_minor_units_never_rounds_past_context_precision():
+    # 29 significant digits: the result can't be represented exactly, so it must not be rounded
+    with pytest.raises(InvalidOperation):
+        to_minor_units(Decimal("123456789012345678901234567.89"), "usd")
+
+
+def test_from_minor_units_is_exact_for_large_values():
+    minor = 12345678901234567890123456789012345
+    major = from_minor_units(minor, "usd")
+    assert major == Decimal("123456789012345678901234567890123.45")
+    assert from_minor_units(10**40, "usd") == Decimal(10**38)
+    assert str(from_minor_units(1234, "usd")) == "12.34"
+    assert str(from_minor_units(-5, "kwd")) == "-0.005"
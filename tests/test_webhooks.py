@@ -0,0 +1,200 @@
+import hashlib
+import hmac
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from univapay.resources.webhooks import (
+    WebhookEvent,
+    WebhookRouter,
+    WebhookVerificationError,
+    _find_sig_header,
+    _parse_sig_header,
+    parse_event,
+    verify_signature,
+)
+
+SECRET = "whsec_test"
+BODY = b'{"id":"ev_1","type":"charge.successful"}'
+
+
+def _sig(body=BODY, secret=SECRET, algo="sha256", prefix=b""):
+    return hmac.new(secret.encode(), prefix + body, getattr(hashlib, algo)).hexdigest()
+
+
+def _event(event_id="ev_1", event_type="charge.successful"):
+    return WebhookEvent(id=event_id, type=event_type)
+
+
+def test_router_dedupe_skips_redelivery_after_success():
+    router = WebhookRouter(dedupe_size=10)
+    calls = []
+    router.add("charge.successful", lambda e: calls.append(e.id) or "ok")
+
+    assert router.dispatch(_event()) == ["ok"]
+    assert router.dispatch(_event()) == []
+    assert calls == ["ev_1"]
+
+
+def test_router_dedupe_runs_redelivery_after_handler_failure():
+    router = WebhookRouter(dedupe_size=10)
+    calls = []
+
+    def handler(e):
+        calls.append(e.id)
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+        return "ok"
+
+    router.add("charge.successful", handler)
+
+    first = router.dispatch(_event())
+    assert isinstance(first[0], RuntimeError)
+    assert router.dispatch(_event()) == ["ok"]  # redelivery is processed, not dropped
+    assert router.dispatch(_event()) == []
+    assert calls == ["ev_1", "ev_1"]
+
+
+def test_router_dedupe_runs_redelivery_after_returned_error():
+    router = WebhookRouter(dedupe_size=10)
+    results = [ValueError("bad"), "ok"]
+    router.add("*", lambda e: results.pop(0))
+
+    assert isinstance(router.dispatch(_event())[0], ValueError)
+    assert router.dispatch(_event()) == ["ok"]
+
+
+def test_router_dedupe_window_evicts_oldest():
+    router = WebhookRouter(dedupe_size=2)
+    router.add("*", lambda e: e.id)
+
+    for event_id in ("a", "b", "c"):
+        assert router.dispatch(_event(event_id)) == [event_id]
+    assert router.dispatch(_event("a")) == ["a"]  # evicted, so handled again
+    assert router.dispatch(_event("c")) == []
+
+
+@pytest.mark.parametrize(
+    "value, parsed",
+    [
+        ("t=123,v1=abc", {"t": "123", "v1": "abc"}),
+        (" t = 123 , v1 = abc ", {"t": "123", "v1": "abc"}),
+        ("sha256=ABC", {"sha256": "ABC"}),
+        ("SHA1=abc", {"sha1": "abc"}),
+        ("abcdef", {"raw": "abcdef"}),
+        ("  abcdef  ", {"raw": "abcdef"}),
+        ("v1.sha256=abc", {"v1.sha256": "abc"}),  # key is the whole part before "="
+        ("x-v1=abc", {"x-v1": "abc"}),
+        ("k==v", {"k": "=v"}),
+        ("sha256=", {"sha256": ""}),
+        ("junk,sha256=abc", {"sha256": "abc"}),
+    ],
+)
+def test_parse_sig_header(value, parsed):
+    assert _parse_sig_header(value) == parsed
+
+
+@pytest.mark.parametrize(
+    "headers, header_name, found",
+    [
+        ({"X-Univapay-Signature": "a"}, None, ("a", "X-Univapay-Signature")),
+        ({"x-univapay-signature": "a"}, None, ("a", "X-Univapay-Signature")),
+        ({"X-UNIVAPAY-SIGNATURE": "a"}, None, ("a", "X-Univapay-Signature")),
+        ({"x-hub-signature": "b", "X-Signature": "a"}, None, ("a", "X-Signature")),
+        ({"X-Univapay-Signature": "", "X-Signature": "a"}, None, ("a", "X-Signature")),
+        ({"X-Custom-Sig": "a"}, "X-Custom-Sig", ("a", "X-Custom-Sig")),
+        ({"x-custom-sig": "a"}, "X-Custom-Sig", ("a", "X-Custom-Sig")),
+    ],
+)
+def test_find_sig_header(headers, header_name, found):
+    assert _find_sig_header(headers, header_name) == found
+
+
+@pytest.mark.parametrize(
+    "headers, header_name",
+    [
+        ({}, None),
+        ({"X-Other": "a"}, None),
+        ({"X-Univapay-Signature": ""}, None),
+        ({"X-Univapay-Signature": "a"}, "X-Custom-Sig"),
+    ],
+)
+def test_find_sig_header_missing(headers, header_name):
+    with pytest.raises(WebhookVerificationError):
+        _find_sig_header(headers, header_name)
+
+
+def _now_header(body=BODY):
+    t = str(int(time.time()))
+    return f"t={t},v1={_sig(body, prefix=f'{t}.'.encode())}"
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        _sig(),
+        _sig().upper(),
+        f"sha256={_sig()}",
+        f"sha256={_sig().upper()}",
+        f"sha1={_sig(algo='sha1')}",
+        _now_header(),
+    ],
+)
+def test_verify_signature_accepts(header):
+    headers = {"X-Univapay-Signature": header}
+    for payload in (BODY, bytearray(BODY), BODY.decode()):
+        assert verify_signature(payload=payload, headers=headers, secret=SECRET)["ok"] is True
+
+
+@pytest.mark.parametrize(
+    "header, reason",
+    [
+        (_sig(body=b"{}"), "mismatch"),
+        (_sig(secret="other"), "mismatch"),
+        (f"sha256={_sig()[:-2]}", "bad_length"),
+        (f"sha256={_sig()}00", "bad_length"),
+        (f"sha1={_sig()}", "bad_length"),
+        ("zz" * 32, "malformed_hex"),
+        (f"sha256={_sig()[:-1]}", "malformed_hex"),
+        (f"v1.sha256={_sig()}", "unsupported_header_format"),
+        (f"t=1,v1={_sig(prefix=b'1.')}", "timestamp_out_of_tolerance"),
+        (f"t=abc,v1={_sig()}", "bad_timestamp"),
+    ],
+)
+def test_verify_signature_rejects(header, reason):
+    with pytest.raises(WebhookVerificationError, match=reason):
+        verify_signature(payload=BODY, headers={"X-Univapay-Signature": header}, secret=SECRET)
+
+
+def test_verify_signature_needs_secret_and_header():
+    with pytest.raises(WebhookVerificationError, match="secret missing"):
+        verify_signature(payload=BODY, headers={"X-Univapay-Signature": _sig()}, secret=None)
+    with pytest.raises(WebhookVerificationError, match="no known signature header"):
+        verify_signature(payload=BODY, headers={}, secret=SECRET)
+    skipped = verify_signature(payload=BODY, headers={}, secret=None, skip_verification=True)
+    assert skipped == {"skipped": True}
+
+
+def test_verify_signature_custom_header_any_case():
+    headers = {"x-my-sig": f"sha256={_sig()}"}
+    out = verify_signature(payload=BODY, headers=headers, secret=SECRET, header_name="X-My-Sig")
+    assert out["ok"]
+
+
+def test_parse_event_lifts_envelope_fields():
+    body = (
+        b'{"id":"ev_1","event":"charge.successful",'
+        b'"resourceType":"charge","createdOn":"2025-01-01"}'
+    )
+    ev = parse_event(body=body, headers={}, skip_verification=True)
+    assert (ev.id, ev.type, ev.resource_type, ev.created_on) == (
+        "ev_1", "charge.successful", "charge", "2025-01-01"
+    )
+    assert ev.data["resourceType"] == "charge"
+
+
+@pytest.mark.parametrize("body", [b'{"id":123}', b'{"type":["x"]}', b'{"mode":{"a":1}}'])
+def test_parse_event_rejects_non_string_envelope_fields(body):
+    with pytest.raises(ValidationError):
+        parse_event(body=body, headers={}, skip_verification=True)
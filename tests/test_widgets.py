@@ -0,0 +1,35 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from univapay.widgets import build_one_time_widget_config, to_json
+
+
+def _payload(**extra):
+    return build_one_time_widget_config(
+        amount=1000,
+        form_id="f1",
+        button_id="b1",
+        description="説明",
+        app_jwt="jwt_abcdefghijk",
+        **extra,
+    )
+
+
+def test_to_json_matches_stdlib_output():
+    payload = _payload()
+    assert to_json(payload) == json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    assert to_json(payload, pretty=True) == json.dumps(payload, ensure_ascii=False, indent=2)
+
+
+def test_to_json_rejects_non_json_values():
+    with pytest.raises(TypeError):
+        to_json(_payload(price=Decimal("10.5")))
+
+
+def test_to_json_writes_nan_and_infinity_like_stdlib():
+    payload = _payload(metadata={"ratio": float("nan"), "cap": float("inf")})
+    out = to_json(payload)
+    assert out == json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    assert '"ratio":NaN' in out and '"cap":Infinity' in out
@@ -20,10 +20,13 @@ __version__ = "0.1.0"
 # ---------------------------------------------------------------------------
 # Public API re-exports
 # ---------------------------------------------------------------------------
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .config import UnivapayConfig
-from .client import UnivapayClient
 from .errors import (
     UnivapaySDKError,
+    UnivapayBatchError,
     UnivapayConfigError,
     UnivapayHTTPError,
     UnivapayWebhookError,
@@ -35,19 +38,6 @@ from .widgets import (
     widget_loader_src,
     to_json as widget_to_json,
 )
-from .resources import (
-    ChargesAPI,
-    SubscriptionsAPI,
-    RefundsAPI,
-    CancelsAPI,
-    TokensAPI,
-    # webhook helpers re-exported via resources.__all__
-    WebhookEvent,
-    WebhookRouter,
-    parse_event,
-    verify_signature,
-    WebhookVerificationError,
-)
 from .utils import (
     normalize_currency,
     currency_exponent,
@@ -59,12 +49,61 @@ from .utils import (
     utcnow_iso,
     safe_metadata,
 )
+from . import debug as _debug
 from .debug import dprint, djson, is_enabled as debug_enabled, set_debug as set_debug_enabled
 
+# ---------------------------------------------------------------------------
+# Lazy re-exports (PEP 562): the HTTP client (httpx) and the resource APIs
+# are imported on first access, not at `import univapay`.
+# ---------------------------------------------------------------------------
+if TYPE_CHECKING:  # pragma: no cover - static analyzers / IDEs only
+    from .client import UnivapayClient
+    from .resources import (
+        ChargesAPI,
+        SubscriptionsAPI,
+        RefundsAPI,
+        CancelsAPI,
+        TokensAPI,
+        WebhookEvent,
+        WebhookRouter,
+        parse_event,
+        verify_signature,
+        WebhookVerificationError,
+    )
+
+_LAZY = {
+    "UnivapayClient": ".client",
+    # resources (webhook helpers re-exported via resources.__all__)
+    "ChargesAPI": ".resources",
+    "SubscriptionsAPI": ".resources",
+    "RefundsAPI": ".resources",
+    "CancelsAPI": ".resources",
+    "TokensAPI": ".resources",
+    "WebhookEvent": ".resources",
+    "WebhookRouter": ".resources",
+    "parse_event": ".resources",
+    "verify_signature": ".resources",
+    "WebhookVerificationError": ".resources",
+}
+
+
+def __getattr__(name: str) -> Any:
+    mod = _LAZY.get(name)
+    if mod is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(mod, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 # ---------------------------------------------------------------------------
 # Debug print on import (sanitized; only if UNIVAPAY_DEBUG is truthy)
 # ---------------------------------------------------------------------------
-dprint("SDK import", {"version": __version__})
+if _debug.DEBUG_ENABLED:
+    dprint("SDK import", {"version": __version__})
 
 __all__ = (
     "__version__",
@@ -73,6 +112,7 @@ __all__ = (
     "UnivapayClient",
     # errors
     "UnivapaySDKError",
+    "UnivapayBatchError",
     "UnivapayConfigError",
     "UnivapayHTTPError",
     "UnivapayWebhookError",
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import debug as _debug
+from .debug import dprint
+from .errors import UnivapaySDKError
+
+# ------------------------------------------------------------------------------
+# File-backed idempotency store (sqlite3, stdlib)
+# ------------------------------------------------------------------------------
+
+IDEM_DB_ENV = "UNIVAPAY_IDEM_DB"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS idem ("
+    " key TEXT PRIMARY KEY,"
+    " body BLOB NOT NULL,"
+    " created INTEGER NOT NULL,"
+    " fp TEXT NOT NULL DEFAULT '')"
+)
+_INDEX = "CREATE INDEX IF NOT EXISTS idem_created ON idem (created)"
+
+
+class SQLiteIdempotencyStore:
+    """
+    Persist successful mutating responses by idempotency key, so a process that
+    restarts after a crash and retries with the same key gets the recorded
+    response instead of sending the request again.
+
+    - Entries expire after `ttl_s` (default 24h; wall-clock, since they outlive
+      the process).
+    - At most `max_entries` rows are kept; the oldest are evicted first.
+    - Safe to share between threads; several processes may point at the same
+      file (sqlite handles the locking).
+    - Each entry keeps a fingerprint of the request it answered; reusing a key
+      for a different request raises instead of replaying the old response.
+    """
+
+    def __init__(self, path: str, *, ttl_s: int = 86400, max_entries: int = 10_000):
+        self.path = path
+        self.ttl_s = int(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        cols = {row[1] for row in self._conn.execute("PRAGMA table_info(idem)")}
+        if "fp" not in cols:  # file created before fingerprints were recorded
+            self._conn.execute("ALTER TABLE idem ADD COLUMN fp TEXT NOT NULL DEFAULT ''")
+        self._conn.execute(_INDEX)
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                "idempotency store opened",
+                {"path": path, "ttl_s": self.ttl_s, "max_entries": self.max_entries},
+            )
+
+    @classmethod
+    def from_env(cls) -> Optional[SQLiteIdempotencyStore]:
+        """Open the store named by UNIVAPAY_IDEM_DB, or return None when unset."""
+        path = os.getenv(IDEM_DB_ENV)
+        return cls(path) if path else None
+
+    def get(self, key: str, fingerprint: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Recorded response for `key`, or None. Raises UnivapaySDKError when the
+        entry was recorded for a request with a different `fingerprint`.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, created, fp FROM idem WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, created, fp = row
+        if created + self.ttl_s <= int(time.time()):
+            return None
+        if fingerprint and fp and fp != fingerprint:
+            raise UnivapaySDKError(
+                "Idempotency-Key was already used for a different request body; use a new key."
+            )
+        try:
+            return json.loads(body)
+        except Exception:
+            return None
+
+    def put(self, key: str, body: Dict[str, Any], fingerprint: str = "") -> None:
+        blob = json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+        now = int(time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO idem (key, body, created, fp) VALUES (?, ?, ?, ?)",
+                (key, blob, now, fingerprint),
+            )
+            self._conn.execute("DELETE FROM idem WHERE created <= ?", (now - self.ttl_s,))
+            self._conn.execute(
+                "DELETE FROM idem WHERE key IN "
+                "(SELECT key FROM idem ORDER BY created DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = ["SQLiteIdempotencyStore", "IDEM_DB_ENV"]
@@ -0,0 +1,65 @@
+"""
+Internal JSON helpers.
+
+Decoding (and lenient debug encoding) uses `orjson` when it is installed
+(``pip install "univapay-python[fast]"``) and falls back to the stdlib `json`
+module otherwise. Strict encoding always uses the stdlib (see `dumps`).
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+# Optional accelerated backend (safe if missing)
+try:
+    import orjson  # type: ignore[import-not-found, unused-ignore]
+except Exception:
+    orjson = None  # type: ignore
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """
+    Decode JSON from str/bytes.
+
+    orjson decodes bytes directly; the stdlib path decodes to str first.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8", errors="replace")
+    return json.loads(data)
+
+
+def dumps(obj: Any, *, pretty: bool = False, strict: bool = True, allow_nan: bool = False) -> bytes:
+    """
+    Encode to compact UTF-8 JSON bytes (indented when `pretty`).
+
+    strict (default; request bodies, widget payloads): the stdlib encoder with
+    the same rules httpx applies to `json=` bodies, so a value JSON can't
+    represent raises (TypeError; ValueError for NaN/Infinity) instead of being
+    sent. orjson is not used here: it silently accepts datetime, UUID, enums
+    and NaN (as null), which would make the payload depend on what is installed.
+    `allow_nan=True` writes NaN/Infinity as the stdlib does by default (widget
+    JSON has always been emitted that way).
+
+    strict=False (debug output only): orjson when installed, and anything JSON
+    can't represent natively is rendered with `str()`.
+    """
+    if strict:
+        if pretty:
+            text = json.dumps(obj, ensure_ascii=False, indent=2, allow_nan=allow_nan)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=allow_nan)
+        return text.encode("utf-8")
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(obj, default=str, option=option)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits: the stdlib handles them
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=str).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+__all__ = ["loads", "dumps"]
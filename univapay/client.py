@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import secrets
+import threading
 import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional, Tuple
 
 import httpx
 
+from . import _json
+from ._idem_store import SQLiteIdempotencyStore
 from .config import UnivapayConfig
+from . import debug as _debug
 from .debug import dprint, djson, scrub_headers
 from .errors import UnivapayHTTPError  # unified error type
 
@@ -30,12 +38,80 @@ TRANSIENT_STATUS: Tuple[int, ...] = (429, 500, 502, 503, 504)
 
 REQUEST_ID_HEADERS: Tuple[str, ...] = ("X-Request-ID", "X-Request-Id")
 
+# Connection pool for the owned httpx.Client (keep-alive across calls)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
+
 
 def _auth_header(secret: str, jwt: str) -> str:
     # Bearer {secret}.{jwt}
     return f"Bearer {secret}.{jwt}"
 
 
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    # Header may be seconds or HTTP-date; we only support seconds here.
+    if not value:
+        return None
+    try:
+        secs = float(value)
+    except (TypeError, ValueError):
+        return None
+    return secs if secs >= 0 else None
+
+
+def _default_idem_key() -> str:
+    # Random per call: makes the client's own retries of one request safe
+    return secrets.token_hex(16)
+
+
+def _request_fingerprint(method: str, path: str, body: Any, params: Any = None) -> str:
+    # Deterministic: same method + path + params + body -> same digest
+    blob = json.dumps(
+        [method, path, params or {}, body], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _auto_idem_key(method: str, path: str, body: Any, params: Any = None) -> str:
+    return "auto-" + _request_fingerprint(method, path, body, params)
+
+
+class _IdempotencyCache:
+    """Small thread-safe LRU of successful mutating responses, with a TTL per entry."""
+
+    __slots__ = ("_data", "_lock", "maxsize", "ttl_s")
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self._data: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = max(1, int(maxsize))
+        self.ttl_s = float(ttl_s)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires, body = hit
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return dict(body)
+
+    def put(self, key: str, body: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, dict(body))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
 def _first_header(headers: httpx.Headers, names: Tuple[str, ...]) -> Optional[str]:
     for n in names:
         v = headers.get(n)
@@ -49,9 +125,38 @@ class UnivapayClient:
     Lightweight sync client for Univapay REST.
 
     - Adds Authorization header "Bearer {secret}.{jwt}".
-    - Supports Idempotency-Key on mutating requests.
+    - Supports Idempotency-Key on mutating requests. POST/PATCH calls made
+      without one get a random key, so the client's own retries of that
+      request cannot apply it twice.
     - Optional simple retries/backoff for transient errors (429/5xx).
     - Prints sanitized debug logs (Authorization redacted).
+    - Keeps one pooled httpx.Client for its lifetime; reuse the instance
+      (or pass a shared `http_client`) so connections stay warm.
+
+    Idempotency cache (off by default):
+      - `idempotency_cache_ttl_s=60` makes POST/PATCH calls made without an
+        `idempotency_key` send a deterministic `auto-<blake2b>` key derived
+        from (method, path, params, body), and remember successful responses
+        for that long (LRU of `idempotency_cache_size` entries). Repeating an
+        identical call within the TTL returns the cached body without
+        touching the network. Only enable it when identical bodies really
+        mean "the same operation".
+
+    Idempotency store (off by default):
+      - `idempotency_store=SQLiteIdempotencyStore(path)` (or env
+        `UNIVAPAY_IDEM_DB=/path/idem.db`) records successful POST/PATCH
+        responses on disk per (method, path, idempotency key) for 24h. A
+        process that crashed mid-request and retries with the same key gets
+        the recorded response instead of re-sending. Only caller-supplied
+        keys are recorded (not random or `auto-` keys), and reusing one for a
+        different body raises UnivapaySDKError.
+
+    Connection options:
+      - `http2=True` enables HTTP/2 (requires `pip install "univapay-python[http2]"`).
+      - `limits` overrides the httpx connection-pool limits.
+      - `http_client` injects an existing httpx.Client (e.g. shared across
+        stores). It must use `base_url=config.base_url`; the SDK does not
+        close clients it did not create.
     """
 
     def __init__(
@@ -60,31 +165,60 @@ class UnivapayClient:
         *,
         retries: int = 0,
         backoff_factor: float = 0.5,
+        http2: bool = False,
+        limits: Optional[httpx.Limits] = None,
+        http_client: Optional[httpx.Client] = None,
+        idempotency_cache_ttl_s: Optional[float] = None,
+        idempotency_cache_size: int = 256,
+        idempotency_store: Optional[SQLiteIdempotencyStore] = None,
     ):
         self.config = config.validate()
         self.retries = max(0, int(retries))
         self.backoff_factor = max(0.0, float(backoff_factor))
-
-        self._client = httpx.Client(
-            base_url=self.config.base_url,
-            timeout=self.config.timeout,
-            headers={
-                "User-Agent": f"univapay-python/{SDK_VERSION}",
-            },
+        self._idem_cache: Optional[_IdempotencyCache] = (
+            _IdempotencyCache(idempotency_cache_size, idempotency_cache_ttl_s)
+            if idempotency_cache_ttl_s and idempotency_cache_ttl_s > 0
+            else None
         )
-        dprint(
-            "Client init",
-            {
-                "base_url": self.config.base_url,
-                "store_id": self.config.store_id,
-                "timeout": self.config.timeout,
-                "debug": self.config.debug,
-                "retries": self.retries,
-                "backoff_factor": self.backoff_factor,
-                "sdk_version": SDK_VERSION,
-            },
+        # Crash-safe record of responses per idempotency key (UNIVAPAY_IDEM_DB opts in)
+        self._owns_store = idempotency_store is None
+        self._idem_store = (
+            idempotency_store if idempotency_store is not None else SQLiteIdempotencyStore.from_env()
         )
 
+        self._owns_client = http_client is None
+        if http_client is not None:
+            self._client = http_client
+        else:
+            self._client = httpx.Client(
+                base_url=self.config.base_url,
+                timeout=self.config.timeout,
+                headers={
+                    "User-Agent": f"univapay-python/{SDK_VERSION}",
+                },
+                http2=http2,
+                limits=limits or DEFAULT_LIMITS,
+            )
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                "Client init",
+                {
+                    "base_url": self.config.base_url,
+                    "store_id": self.config.store_id,
+                    "timeout": self.config.timeout,
+                    "debug": self.config.debug,
+                    "retries": self.retries,
+                    "backoff_factor": self.backoff_factor,
+                    "http2": http2,
+                    "shared_http_client": not self._owns_client,
+                    "idempotency_cache_ttl_s": (
+                        idempotency_cache_ttl_s if self._idem_cache else None
+                    ),
+                    "idempotency_store": getattr(self._idem_store, "path", None),
+                    "sdk_version": SDK_VERSION,
+                },
+            )
+
     # ------------ context manager support ------------
     def __enter__(self) -> "UnivapayClient":
         dprint("__enter__()")
@@ -110,7 +244,8 @@ class UnivapayClient:
             h["Idempotency-Key"] = idempotency_key
         if extra:
             h.update(extra)
-        djson("Request headers", scrub_headers(h))
+        if _debug.DEBUG_ENABLED:
+            djson("Request headers", scrub_headers(h))
         return h
 
     def _extract_meta(self, r: httpx.Response) -> Dict[str, Any]:
@@ -125,16 +260,17 @@ class UnivapayClient:
 
     def _handle(self, r: httpx.Response) -> Dict[str, Any]:
         meta = self._extract_meta(r)
-        dprint("Response", {"status": r.status_code, "request_id": meta.get("request_id")})
-        if meta:
-            dprint("Rate limits", {k: v for k, v in meta.items() if k in RATE_HEADERS})
+        if _debug.DEBUG_ENABLED:
+            dprint("Response", {"status": r.status_code, "request_id": meta.get("request_id")})
+            if meta:
+                dprint("Rate limits", {k: v for k, v in meta.items() if k in RATE_HEADERS})
 
         # Parse body safely
         if r.status_code == 204 or not r.content:
             body: Dict[str, Any] = {}
         else:
             try:
-                body = r.json()
+                body = _json.loads(r.content)
                 if not isinstance(body, dict):
                     body = {"data": body}
             except Exception:
@@ -151,7 +287,12 @@ class UnivapayClient:
             return body
 
         # Error path
-        raise UnivapayHTTPError(r.status_code, body, meta.get("request_id"))
+        raise UnivapayHTTPError(
+            r.status_code,
+            body,
+            meta.get("request_id"),
+            retry_after=_retry_after_seconds(meta.get("retry_after")),
+        )
 
     def _path(self, resource: str) -> str:
         p = f"/stores/{self.config.store_id}/{resource}" if self.config.store_id else f"/{resource}"
@@ -160,28 +301,25 @@ class UnivapayClient:
 
     def _sleep_for_retry(self, attempt: int, *, retry_after_header: Optional[str]) -> float:
         # Use Retry-After if present (seconds). Fallback to exponential backoff.
-        if retry_after_header:
-            try:
-                # Header may be seconds or HTTP-date; we only support seconds here.
-                secs = float(retry_after_header)
-                if secs >= 0:
-                    return secs
-            except Exception:
-                pass
+        secs = _retry_after_seconds(retry_after_header)
+        if secs is not None:
+            return secs
         return self.backoff_factor * (2 ** attempt)
 
     def _send_with_retries(self, method: str, url: str, **kwargs) -> httpx.Response:
         attempt = 0
         while True:
             try:
-                dprint("HTTP send", {"method": method.upper(), "url": url})
+                if _debug.DEBUG_ENABLED:
+                    dprint("HTTP send", {"method": method.upper(), "url": url})
                 r = self._client.request(method, url, **kwargs)
                 if r.status_code in TRANSIENT_STATUS and attempt < self.retries:
                     wait = self._sleep_for_retry(attempt, retry_after_header=r.headers.get("Retry-After"))
-                    dprint(
-                        "Transient response -> retry",
-                        {"status": r.status_code, "attempt": attempt + 1, "sleep": wait},
-                    )
+                    if _debug.DEBUG_ENABLED:
+                        dprint(
+                            "Transient response -> retry",
+                            {"status": r.status_code, "attempt": attempt + 1, "sleep": wait},
+                        )
                     time.sleep(max(0.0, wait))
                     attempt += 1
                     continue
@@ -189,16 +327,73 @@ class UnivapayClient:
             except (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError, httpx.HTTPError) as e:
                 if attempt < self.retries:
                     wait = self.backoff_factor * (2 ** attempt)
-                    dprint(
-                        "Network error -> retry",
-                        {"error": repr(e), "attempt": attempt + 1, "sleep": wait},
-                    )
+                    if _debug.DEBUG_ENABLED:
+                        dprint(
+                            "Network error -> retry",
+                            {"error": repr(e), "attempt": attempt + 1, "sleep": wait},
+                        )
                     time.sleep(max(0.0, wait))
                     attempt += 1
                     continue
-                dprint("Network error -> giving up", {"error": repr(e)})
+                if _debug.DEBUG_ENABLED:
+                    dprint("Network error -> giving up", {"error": repr(e)})
                 raise UnivapayHTTPError(-1, {"message": str(e)}, None) from e
 
+    def _send_idempotent(
+        self,
+        method: str,
+        resource_path: str,
+        body: Dict[str, Any],
+        idempotency_key: Optional[str],
+        params: Dict[str, Any] | None,
+        extra_headers: Optional[Dict[str, str]],
+    ) -> Dict[str, Any]:
+        # Resolve the key: caller's, deterministic (cache on) or random (retry-safety only)
+        cache = self._idem_cache
+        cache_key = None
+        caller_key = idempotency_key is not None
+        if idempotency_key is None:
+            if cache is None:
+                idempotency_key = _default_idem_key()
+            else:
+                idempotency_key = cache_key = _auto_idem_key(method, resource_path, body, params)
+                hit = cache.get(cache_key)
+                if hit is not None:
+                    if _debug.DEBUG_ENABLED:
+                        dprint(
+                            f"{method} served from idempotency cache",
+                            {"path": resource_path, "key": cache_key},
+                        )
+                    return hit
+
+        # Only caller-supplied keys are persisted: random keys are never sent again, and
+        # `auto-` keys must expire with the cache TTL rather than the store's 24h
+        store = self._idem_store if caller_key else None
+        store_key = fingerprint = ""
+        if store is not None:
+            store_key = f"{method} {resource_path} {idempotency_key}"
+            fingerprint = _request_fingerprint(method, resource_path, body, params)
+            # raises if the key was used for another body
+            stored = store.get(store_key, fingerprint)
+            if stored is not None:
+                if _debug.DEBUG_ENABLED:
+                    dprint(f"{method} served from idempotency store", {"path": resource_path})
+                return stored
+
+        r = self._send_with_retries(
+            method,
+            resource_path,
+            content=_json.dumps(body),
+            params=params,
+            headers=self._headers(idempotency_key=idempotency_key, extra=extra_headers),
+        )
+        resp = self._handle(r)
+        if cache is not None and cache_key is not None:
+            cache.put(cache_key, resp)
+        if store is not None:
+            store.put(store_key, resp, fingerprint)
+        return resp
+
     # ------------ public request helpers ------------
     def get(
         self,
@@ -211,7 +406,8 @@ class UnivapayClient:
         params = dict(params or {})
         if polling:
             params["polling"] = "true"
-        dprint("GET", {"path": resource_path, "params": params})
+        if _debug.DEBUG_ENABLED:
+            dprint("GET", {"path": resource_path, "params": params})
         r = self._send_with_retries(
             "GET",
             resource_path,
@@ -220,6 +416,36 @@ class UnivapayClient:
         )
         return self._handle(r)
 
+    def get_raw(
+        self,
+        resource_path: str,
+        *,
+        polling: bool = False,
+        params: Dict[str, Any] | None = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> bytes:
+        """
+        GET and return the 2xx response body bytes unchanged (no JSON parse, no `_meta`).
+        Useful for passthrough endpoints; errors still raise UnivapayHTTPError.
+        """
+        params = dict(params or {})
+        if polling:
+            params["polling"] = "true"
+        if _debug.DEBUG_ENABLED:
+            dprint("GET (raw)", {"path": resource_path, "params": params})
+        r = self._send_with_retries(
+            "GET",
+            resource_path,
+            params=params,
+            headers=self._headers(extra=extra_headers),
+        )
+        if 200 <= r.status_code < 300:
+            if _debug.DEBUG_ENABLED:
+                dprint("Response (raw)", {"status": r.status_code, "bytes": len(r.content)})
+            return r.content
+        self._handle(r)  # raises UnivapayHTTPError with the parsed error body
+        raise UnivapayHTTPError(r.status_code, {"message": r.text}, None)  # pragma: no cover
+
     def post(
         self,
         resource_path: str,
@@ -229,16 +455,12 @@ class UnivapayClient:
         params: Dict[str, Any] | None = None,
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
-        dprint("POST", {"path": resource_path})
-        djson("Request JSON", json)
-        r = self._send_with_retries(
-            "POST",
-            resource_path,
-            json=json,
-            params=params,
-            headers=self._headers(idempotency_key=idempotency_key, extra=extra_headers),
+        if _debug.DEBUG_ENABLED:
+            dprint("POST", {"path": resource_path})
+            djson("Request JSON", json)
+        return self._send_idempotent(
+            "POST", resource_path, json, idempotency_key, params, extra_headers
         )
-        return self._handle(r)
 
     def patch(
         self,
@@ -249,16 +471,12 @@ class UnivapayClient:
         params: Dict[str, Any] | None = None,
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
-        dprint("PATCH", {"path": resource_path})
-        djson("Request JSON", json)
-        r = self._send_with_retries(
-            "PATCH",
-            resource_path,
-            json=json,
-            params=params,
-            headers=self._headers(idempotency_key=idempotency_key, extra=extra_headers),
+        if _debug.DEBUG_ENABLED:
+            dprint("PATCH", {"path": resource_path})
+            djson("Request JSON", json)
+        return self._send_idempotent(
+            "PATCH", resource_path, json, idempotency_key, params, extra_headers
         )
-        return self._handle(r)
 
     def put(
         self,
@@ -269,12 +487,13 @@ class UnivapayClient:
         params: Dict[str, Any] | None = None,
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
-        dprint("PUT", {"path": resource_path})
-        djson("Request JSON", json)
+        if _debug.DEBUG_ENABLED:
+            dprint("PUT", {"path": resource_path})
+            djson("Request JSON", json)
         r = self._send_with_retries(
             "PUT",
             resource_path,
-            json=json,
+            content=_json.dumps(json),
             params=params,
             headers=self._headers(idempotency_key=idempotency_key, extra=extra_headers),
         )
@@ -289,13 +508,14 @@ class UnivapayClient:
         params: Dict[str, Any] | None = None,
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
-        dprint("DELETE", {"path": resource_path})
-        if json is not None:
-            djson("Request JSON", json)
+        if _debug.DEBUG_ENABLED:
+            dprint("DELETE", {"path": resource_path})
+            if json is not None:
+                djson("Request JSON", json)
         r = self._send_with_retries(
             "DELETE",
             resource_path,
-            json=json,
+            content=_json.dumps(json) if json is not None else None,
             params=params,
             headers=self._headers(idempotency_key=idempotency_key, extra=extra_headers),
         )
@@ -308,7 +528,8 @@ class UnivapayClient:
         params: Dict[str, Any] | None = None,
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
-        dprint("HEAD", {"path": resource_path, "params": params or {}})
+        if _debug.DEBUG_ENABLED:
+            dprint("HEAD", {"path": resource_path, "params": params or {}})
         r = self._send_with_retries(
             "HEAD",
             resource_path,
@@ -322,5 +543,9 @@ class UnivapayClient:
                           "retry_after": meta.get("retry_after")}}
 
     def close(self) -> None:
-        dprint("Client close()")
-        self._client.close()
+        if _debug.DEBUG_ENABLED:
+            dprint("Client close()", {"owned": self._owns_client})
+        if self._owns_client:
+            self._client.close()
+        if self._owns_store and self._idem_store is not None:
+            self._idem_store.close()
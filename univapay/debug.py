@@ -1,22 +1,27 @@
 from __future__ import annotations
 import os
-import json
-import datetime
 import re
+import time
 from typing import Any, Dict, Mapping, Optional
 
+from . import _json
+
 # ------------------------------------------------------------------------------
 # Debug flag (env overrideable) + runtime toggles
 # ------------------------------------------------------------------------------
-_DEBUG_ENABLED = os.getenv("UNIVAPAY_DEBUG", "1").lower() not in ("0", "false", "no", "off", "")
+# dprint()/djson() return at once when debug is off, but their arguments are
+# still built: calls that format an f-string, build a dict or call a helper go
+# inside `if debug.DEBUG_ENABLED:` (read the module attribute so set_debug() is
+# honoured). Calls with only literals or existing objects need no gate.
+DEBUG_ENABLED = os.getenv("UNIVAPAY_DEBUG", "1").lower() not in ("0", "false", "no", "off", "")
 
 def is_enabled() -> bool:
-    return _DEBUG_ENABLED
+    return DEBUG_ENABLED
 
 def set_debug(enabled: bool) -> None:
     """Enable/disable debug printing at runtime."""
-    global _DEBUG_ENABLED
-    _DEBUG_ENABLED = bool(enabled)
+    global DEBUG_ENABLED
+    DEBUG_ENABLED = bool(enabled)
 
 # ------------------------------------------------------------------------------
 # Helpers
@@ -31,7 +36,7 @@ MAX_JSON_CHARS = int(os.getenv("UNIVAPAY_DEBUG_MAX_JSON", "50000"))  # cap print
 
 def _ts() -> str:
     # ISO 8601 UTC timestamp, e.g., 2025-09-13T10:20:30Z
-    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 def _mask_value(val: Optional[str]) -> Optional[str]:
     if val is None:
@@ -78,13 +83,19 @@ def scrub_headers(h: Mapping[str, str]) -> Dict[str, str]:
 # Printing helpers
 # ------------------------------------------------------------------------------
 def dprint(*args: Any) -> None:
-    if _DEBUG_ENABLED:
+    if DEBUG_ENABLED:
         print("[UnivapaySDK]", _ts(), *args, flush=True)
 
 def djson(label: str, data: Any) -> None:
-    if _DEBUG_ENABLED:
+    """
+    Pretty-print `data` as JSON. `data` may be a zero-arg callable (e.g.
+    `lambda: model.model_dump(mode="json")`); it is only called when debug is on.
+    """
+    if DEBUG_ENABLED:
+        if callable(data):
+            data = data()
         try:
-            s = json.dumps(data, ensure_ascii=False, indent=2, default=str)
+            s = _json.dumps(data, pretty=True, strict=False).decode("utf-8")
         except Exception:
             s = repr(data)
         if len(s) > MAX_JSON_CHARS:
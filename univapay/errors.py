@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List
 
+from . import debug as _debug
 from .debug import dprint, djson
 
 
@@ -35,6 +36,8 @@ class UnivapayHTTPError(UnivapaySDKError):
         Best-effort HTTP method that triggered the error (if provided).
     url : Optional[str]
         Best-effort URL that triggered the error (if provided).
+    retry_after : Optional[float]
+        Seconds from the server's Retry-After header (e.g. on 429), if sent.
 
     Convenience
     -----------
@@ -52,21 +55,25 @@ class UnivapayHTTPError(UnivapaySDKError):
         *,
         method: Optional[str] = None,
         url: Optional[str] = None,
+        retry_after: Optional[float] = None,
     ):
         self.status = int(status)
         self.payload = payload
         self.request_id = request_id
         self.method = method
         self.url = url
+        self.retry_after = retry_after
 
         # Debug output (payload is printed via djson; avoid leaking secrets)
-        dprint("UnivapayHTTPError", {
-            "status": self.status,
-            "request_id": self.request_id,
-            "method": self.method,
-            "url": self.url,
-        })
-        djson("UnivapayHTTPError payload", self.payload)
+        if _debug.DEBUG_ENABLED:
+            dprint("UnivapayHTTPError", {
+                "status": self.status,
+                "request_id": self.request_id,
+                "method": self.method,
+                "url": self.url,
+                "retry_after": self.retry_after,
+            })
+            djson("UnivapayHTTPError payload", self.payload)
 
         super().__init__(self._message())
 
@@ -155,11 +162,30 @@ class UnivapayHTTPError(UnivapaySDKError):
             "code": self.code,
             "message": self.message_text,
             "retryable": self.retryable,
+            "retry_after": self.retry_after,
         }
 
 
+class UnivapayBatchError(UnivapaySDKError):
+    """
+    Raised by batch helpers (e.g. `ChargesAPI.create_many`) when some items failed.
+
+    `results` keeps the order of the input items: the created object for each
+    item that succeeded and the exception for each item that failed, so the
+    caller can see which requests went through. `failed` lists the failed indexes.
+    """
+
+    def __init__(self, results: List[Any]):
+        self.results = results
+        self.failed = [i for i, r in enumerate(results) if isinstance(r, Exception)]
+        super().__init__(
+            f"{len(self.failed)} of {len(results)} batch items failed (indexes {self.failed})"
+        )
+
+
 __all__ = [
     "UnivapaySDKError",
+    "UnivapayBatchError",
     "UnivapayConfigError",
     "UnivapayHTTPError",
     "UnivapayWebhookError",
@@ -71,17 +71,17 @@ class Charge(_APIModel):
     id: str
 
     # Common fields as seen in list/get responses (snake_case from API)
-    requested_amount: Optional[int] = Field(None, alias="requested_amount")
-    requested_currency: Optional[str] = Field(None, alias="requested_currency")
-    charged_amount: Optional[int] = Field(None, alias="charged_amount")
-    charged_currency: Optional[str] = Field(None, alias="charged_currency")
+    requested_amount: Optional[int] = None
+    requested_currency: Optional[str] = None
+    charged_amount: Optional[int] = None
+    charged_currency: Optional[str] = None
 
     # Fallback flat fields if present on some endpoints
     amount: Optional[int] = None
     currency: Optional[str] = None
 
     status: Optional[str] = None  # keep permissive; API returns lower-case like "successful"
-    transaction_token_id: Optional[str] = Field(None, alias="transaction_token_id")
+    transaction_token_id: Optional[str] = None
 
     @field_validator("currency", "requested_currency", "charged_currency")
     @classmethod
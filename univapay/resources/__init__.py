@@ -18,20 +18,55 @@ Webhook helpers:
 - parse_event
 - verify_signature
 - WebhookVerificationError
+
+Submodules are imported on first attribute access (PEP 562), so e.g. a
+webhook-only worker never loads the charge/subscription APIs.
 """
 
-from .charges import ChargesAPI
-from .subscriptions import SubscriptionsAPI
-from .refunds import RefundsAPI
-from .cancels import CancelsAPI
-from .tokens import TokensAPI
-from .webhooks import (
-    WebhookEvent,
-    WebhookRouter,
-    parse_event,
-    verify_signature,
-    WebhookVerificationError,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover - static analyzers / IDEs only
+    from .charges import ChargesAPI
+    from .subscriptions import SubscriptionsAPI
+    from .refunds import RefundsAPI
+    from .cancels import CancelsAPI
+    from .tokens import TokensAPI
+    from .webhooks import (
+        WebhookEvent,
+        WebhookRouter,
+        parse_event,
+        verify_signature,
+        WebhookVerificationError,
+    )
+
+# public name -> submodule that defines it
+_LAZY = {
+    "ChargesAPI": ".charges",
+    "SubscriptionsAPI": ".subscriptions",
+    "RefundsAPI": ".refunds",
+    "CancelsAPI": ".cancels",
+    "TokensAPI": ".tokens",
+    "WebhookEvent": ".webhooks",
+    "WebhookRouter": ".webhooks",
+    "parse_event": ".webhooks",
+    "verify_signature": ".webhooks",
+    "WebhookVerificationError": ".webhooks",
+}
+
+
+def __getattr__(name: str) -> Any:
+    mod = _LAZY.get(name)
+    if mod is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(mod, __name__), name)
+    globals()[name] = value  # cache: later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __all__ = (
     "ChargesAPI",
@@ -0,0 +1,277 @@
+from __future__ import annotations
+import asyncio
+import random
+import threading
+import time
+from collections.abc import Awaitable, Coroutine, Iterator
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from ..errors import UnivapayHTTPError
+
+T = TypeVar("T")
+
+# ------------------------------------------------------------------------------
+# Shared 429-aware poll scheduler
+# ------------------------------------------------------------------------------
+
+_THROTTLE_ALPHA = 0.2      # EWMA weight of the latest poll outcome
+_MAX_MULTIPLIER = 32.0     # widest stretch applied to the backoff delay
+
+
+class _PollScheduler:
+    """
+    Process-wide, thread-safe view of how hard the API is throttling polls.
+
+    State is kept per key (the tenant: base URL + store), so every waiter for
+    the same store (charges, refunds, subscriptions) shares one quota picture.
+
+    - observe(key, 429, retry_after): the delay multiplier doubles (up to
+      _MAX_MULTIPLIER) and no poll is scheduled before Retry-After elapses.
+    - observe(key, 2xx): the multiplier narrows again, faster while the EWMA
+      of 429s is low.
+    - next_delay(key, delay): stretches a backoff delay by the multiplier and
+      honours any pending Retry-After.
+    """
+
+    __slots__ = ("_lock", "_state")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, float]] = {}
+
+    def observe(self, key: str, status: int, retry_after: Optional[float] = None) -> None:
+        throttled = status == 429
+        with self._lock:
+            st = self._state.get(key)
+            if st is None:
+                if not throttled:
+                    return  # nothing learned yet; keep the fast path allocation-free
+                st = self._state[key] = {"rate": 0.0, "mult": 1.0, "not_before": 0.0}
+            st["rate"] += _THROTTLE_ALPHA * ((1.0 if throttled else 0.0) - st["rate"])
+            if throttled:
+                st["mult"] = min(_MAX_MULTIPLIER, st["mult"] * 2.0)
+                if retry_after:
+                    st["not_before"] = max(st["not_before"], time.monotonic() + retry_after)
+            else:
+                st["mult"] = max(1.0, st["mult"] * (0.5 + st["rate"]))
+
+    def next_delay(self, key: str, delay: float) -> float:
+        with self._lock:
+            st = self._state.get(key)
+            if st is None:
+                return delay
+            return max(delay * st["mult"], st["not_before"] - time.monotonic())
+
+    def throttle_rate(self, key: str) -> float:
+        """EWMA of the share of recent polls that got a 429 (0.0 when unknown)."""
+        with self._lock:
+            st = self._state.get(key)
+            return st["rate"] if st else 0.0
+
+
+poll_scheduler = _PollScheduler()
+
+
+def quota_key(client: Any) -> str:
+    """Scheduler key for a client: one bucket per API host + store."""
+    cfg = client.config
+    return f"{cfg.base_url}|{cfg.store_id or ''}"
+
+
+def observed_get(key: str, fetch: Callable[[], T]) -> Optional[T]:
+    """
+    Run one poll GET and report its outcome to `poll_scheduler`.
+
+    Returns None when the poll was throttled (429) so the caller keeps waiting
+    instead of failing; other errors propagate unchanged.
+    """
+    try:
+        result = fetch()
+    except UnivapayHTTPError as e:
+        poll_scheduler.observe(key, e.status, e.retry_after)
+        if e.status == 429:
+            return None
+        raise
+    poll_scheduler.observe(key, 200)
+    return result
+
+# ------------------------------------------------------------------------------
+# Client-side polling helpers (shared by the wait_until_terminal() waiters)
+# ------------------------------------------------------------------------------
+
+def backoff_sleeps(
+    base: float,
+    cap: float,
+    deadline: float,
+    *,
+    jitter: bool = True,
+    key: Optional[str] = None,
+) -> Iterator[float]:
+    """
+    Yield sleep durations for a client-side polling loop.
+
+    Starts at `base`, doubles after every poll up to `cap`, and (with `jitter`)
+    scales each value by a random factor in [0.5, 1.5) so concurrent waiters
+    don't hit the API in lockstep. Each value is clamped to the time left
+    before `deadline` (a `time.monotonic()` value); the iterator stops once
+    the deadline has passed. With a `key`, each value is first stretched by
+    `poll_scheduler` when the API has been answering 429.
+    """
+    current = min(base, cap)
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        delay = current * random.uniform(0.5, 1.5) if jitter else current
+        if key is not None:
+            delay = poll_scheduler.next_delay(key, delay)
+        yield min(delay, remaining)
+        current = min(cap, current * 2)
+
+
+
+# ------------------------------------------------------------------------------
+# In-process coalescing: concurrent waiters on one resource share one poller
+# ------------------------------------------------------------------------------
+
+class _Inflight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_inflight_lock = threading.Lock()
+_inflight: Dict[tuple, _Inflight] = {}
+_inflight_async: Dict[tuple, asyncio.Task[Any]] = {}
+
+
+def coalesced(
+    key: tuple,
+    run: Callable[[float], T],
+    timeout_s: float,
+    fallback: Callable[[], T],
+    is_done: Callable[[T], bool],
+) -> T:
+    """
+    Run `run(timeout_s)` once per `key` across threads.
+
+    The first caller polls; callers arriving while it is in flight block on
+    its outcome (result or exception) instead of starting their own loop. A
+    follower that is still waiting after its own `timeout_s` returns
+    `fallback()` (a single GET) rather than overstaying its timeout. If the
+    shared result is not `is_done` (the leader's shorter timeout ran out) and
+    the follower still has time left, it keeps polling with what remains.
+    """
+    deadline = time.monotonic() + timeout_s
+    while True:
+        with _inflight_lock:
+            fl = _inflight.get(key)
+            leader = fl is None
+            if fl is None:
+                fl = _inflight[key] = _Inflight()
+        if leader:
+            try:
+                fl.result = run(deadline - time.monotonic())
+                return fl.result
+            except BaseException as e:
+                fl.error = e
+                raise
+            finally:
+                with _inflight_lock:
+                    _inflight.pop(key, None)
+                fl.done.set()
+        if not fl.done.wait(max(0.0, deadline - time.monotonic())):
+            return fallback()
+        if fl.error is not None:
+            raise fl.error
+        if is_done(fl.result) or deadline - time.monotonic() <= 0:
+            return fl.result
+
+
+async def coalesced_async(
+    key: tuple,
+    run: Callable[[float], Coroutine[Any, Any, T]],
+    timeout_s: float,
+    fallback: Callable[[], Awaitable[T]],
+    is_done: Callable[[T], bool],
+) -> T:
+    """
+    Async twin of `coalesced`: one polling task per `key` (and event loop);
+    other awaiters share it. The task is shielded, so cancelling one awaiter
+    does not cancel the poll for the rest.
+    """
+    loop = asyncio.get_running_loop()
+    k = (id(loop),) + key
+    deadline = time.monotonic() + timeout_s
+    while True:
+        task = _inflight_async.get(k)
+        if task is None or task.done():  # a finished task may linger until its callback runs
+            task = loop.create_task(run(deadline - time.monotonic()))
+            _inflight_async[k] = task
+
+            def _forget(t: asyncio.Task[Any]) -> None:
+                if _inflight_async.get(k) is t:
+                    del _inflight_async[k]
+
+            task.add_done_callback(_forget)
+            return await asyncio.shield(task)
+        try:
+            remaining = max(0.0, deadline - time.monotonic())
+            result = await asyncio.wait_for(asyncio.shield(task), remaining)
+        except asyncio.TimeoutError:
+            return await fallback()
+        if is_done(result) or deadline - time.monotonic() <= 0:
+            return result
+
+
+async def poll_until_async(
+    fetch: Callable[[], T],
+    is_done: Callable[[T], bool],
+    *,
+    interval_s: float,
+    max_interval_s: float,
+    deadline: float,
+    jitter: bool = True,
+    last: Optional[T] = None,
+    key: Optional[str] = None,
+) -> T:
+    """
+    Async twin of the waiter loops.
+
+    The blocking `fetch` (an SDK GET) runs in a worker thread via
+    asyncio.to_thread and the waits use asyncio.sleep, so the event loop stays
+    free while the resource settles. If `last` is given it counts as the first
+    poll. Returns the first result for which `is_done` is true, or the last
+    result seen when the deadline passes. With a `key`, loop polls go through
+    `observed_get` so 429s widen the wait instead of failing.
+    """
+    if last is None:
+        last = await asyncio.to_thread(fetch)
+        if is_done(last):
+            return last
+    for delay in backoff_sleeps(interval_s, max_interval_s, deadline, jitter=jitter, key=key):
+        await asyncio.sleep(delay)
+        if key is None:
+            last = await asyncio.to_thread(fetch)
+        else:
+            cur: Optional[T] = await asyncio.to_thread(observed_get, key, fetch)
+            if cur is None:
+                continue  # throttled (429); the scheduler widens the next wait
+            last = cur
+        if is_done(last):
+            return last
+    return last
+
+
+__all__ = [
+    "backoff_sleeps",
+    "poll_until_async",
+    "poll_scheduler",
+    "quota_key",
+    "observed_get",
+    "coalesced",
+    "coalesced_async",
+]
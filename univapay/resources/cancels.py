@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import Any, Optional
 
 from ..client import UnivapayClient
+from .. import debug as _debug
 from ..debug import dprint, djson
 from ..models import Charge
 
@@ -22,8 +23,11 @@ class CancelsAPI:
     authorization. This SDK provides a `void_authorization` alias for clarity.
     """
 
+    __slots__ = ("client", "_charges_base")
+
     def __init__(self, client: UnivapayClient):
         self.client = client
+        self._charges_base = client._path("charges")  # fixed per client; resolved once
 
     def cancel_charge(
         self,
@@ -51,13 +55,14 @@ class CancelsAPI:
         """
         _validate_id("charge_id", charge_id)
 
-        path = f"{self.client._path('charges')}/{charge_id}/cancel"
-        dprint(
-            "cancels.cancel_charge()",
-            {"charge_id": charge_id, "idempotency_key_present": bool(idempotency_key)},
-        )
-        body = {**extra} if extra else {}
-        djson("cancels.cancel_charge body", body)
+        path = f"{self._charges_base}/{charge_id}/cancel"
+        body = extra  # fresh dict from **extra; no copy needed
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"cancels.cancel_charge() charge_id={charge_id} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("cancels.cancel_charge body", body)
 
         resp = self.client.post(path, json=body, idempotency_key=idempotency_key)
         return Charge.model_validate(resp)
@@ -85,7 +90,8 @@ class CancelsAPI:
         -------
         Charge
         """
-        dprint("cancels.void_authorization() -> cancel_charge()", {"charge_id": charge_id})
+        if _debug.DEBUG_ENABLED:
+            dprint(f"cancels.void_authorization() -> cancel_charge() charge_id={charge_id}")
         return self.cancel_charge(
             charge_id,
             idempotency_key=idempotency_key,
@@ -1,10 +1,28 @@
 from __future__ import annotations
+import asyncio
 import time
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
 
 from ..client import UnivapayClient
+from .. import debug as _debug
 from ..debug import dprint, djson
-from ..models import ChargeCreate, Charge, Refund
+from ..errors import UnivapayBatchError
+from ..models import Charge, Refund
+from ._polling import (
+    backoff_sleeps,
+    coalesced,
+    coalesced_async,
+    observed_get,
+    poll_until_async,
+    quota_key,
+)
+
+
+# One create_many() result: the created charge, or the exception for that item.
+ChargeResult = Union[Charge, Exception]
 
 
 def _charges_base(client: UnivapayClient) -> str:
@@ -13,14 +31,35 @@ def _charges_base(client: UnivapayClient) -> str:
 
 # API tends to return lower-case statuses like "successful".
 # We normalize comparisons to lower-case to be safe.
-_TERMINAL_STATES = {
+_TERMINAL_STATES = frozenset((
     "successful",
     "failed",
     "error",
     "canceled",
     "captured",   # seen on some flows
     # "authorized" is typically NOT terminal; omit unless your flow considers it terminal
-}
+))
+
+# Exact-match fast path: canonical spellings plus common case variants
+_TERMINAL_STATES_FAST = frozenset(
+    v for s in _TERMINAL_STATES for v in (s, s.upper(), s.capitalize())
+)
+
+
+@lru_cache(maxsize=64)
+def _is_terminal_slow(status: str) -> bool:
+    # Statuses come from a small vocabulary, so caching the normalized answer
+    # also spares the strip/lower copies for non-terminal values like "pending".
+    return status.strip().lower() in _TERMINAL_STATES
+
+
+def _is_terminal(status: Optional[str]) -> bool:
+    # Pollers pass the unvalidated "status" from the raw dict, so it may be any JSON value
+    if not status or not isinstance(status, str):
+        return False
+    if status in _TERMINAL_STATES_FAST:
+        return True
+    return _is_terminal_slow(status)
 
 
 # ----------------------- validation helpers -----------------------
@@ -30,6 +69,8 @@ def _validate_amount(amount: int) -> None:
         raise ValueError("amount must be a positive integer (minor units, e.g., JPY).")
 
 def _validate_currency(currency: str) -> str:
+    if currency == "jpy":  # default; skip the strip/lower copies
+        return currency
     if not isinstance(currency, str) or len(currency.strip()) < 3:
         raise ValueError("currency must be a valid ISO code string (e.g., 'jpy').")
     return currency.strip().lower()
@@ -54,9 +95,13 @@ class ChargesAPI:
       - Use `get(..., polling=True)` or `wait_until_terminal(...)` to block until a terminal status.
     """
 
+    __slots__ = ("client", "_base")
+
     def __init__(self, client: UnivapayClient):
         self.client = client
-        dprint("charges.__init__()", {"base_path": _charges_base(self.client)})
+        self._base = _charges_base(client)  # fixed per client; resolved once
+        if _debug.DEBUG_ENABLED:
+            dprint(f"charges.__init__() base_path={self._base}")
 
     # ----------------------- create: one-time -----------------------
 
@@ -78,27 +123,27 @@ class ChargesAPI:
         _validate_amount(amount)
         currency = _validate_currency(currency)
 
-        dprint("charges.create_one_time()", {
-            "token_id": token_id,
+        # Same shape as ChargeCreate(...).model_dump(by_alias=True); inputs are already
+        # validated above, so skip building a throwaway model on every charge.
+        body: Dict[str, Any] = {
+            "transaction_token_id": token_id.strip(),
             "amount": amount,
             "currency": currency,
             "capture": capture,
-            "idempotency_key_present": bool(idempotency_key),
-        })
-
-        body = ChargeCreate(
-            transaction_token_id=token_id,
-            amount=amount,
-            currency=currency,
-            capture=capture,
-        ).model_dump(by_alias=True)
-
+        }
         if metadata:
             body["metadata"] = metadata
-        body.update(extra or {})
-
-        djson("charges.create_one_time body", body)
-        resp = self.client.post(_charges_base(self.client), json=body, idempotency_key=idempotency_key)
+        if extra:
+            body.update(extra)
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.create_one_time() token_id={token_id} amount={amount} "
+                f"currency={currency} capture={capture} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("charges.create_one_time body", body)
+        resp = self.client.post(self._base, json=body, idempotency_key=idempotency_key)
         return Charge.model_validate(resp)
 
     # ----------------------- create: recurring -----------------------
@@ -122,13 +167,12 @@ class ChargesAPI:
         _validate_amount(amount)
         currency = _validate_currency(currency)
 
-        dprint("charges.create_recurring()", {
-            "token_id": token_id,
-            "amount": amount,
-            "currency": currency,
-            "capture": capture,
-            "idempotency_key_present": bool(idempotency_key),
-        })
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.create_recurring() token_id={token_id} amount={amount} "
+                f"currency={currency} capture={capture} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
 
         # Delegate to the same creation logic to keep behavior identical.
         return self.create_one_time(
@@ -141,6 +185,68 @@ class ChargesAPI:
             **(extra or {}),
         )
 
+    # ----------------------- create: bulk -----------------------
+
+    def create_many(
+        self,
+        items: Sequence[Mapping[str, Any]],
+        *,
+        concurrency: int = 16,
+        idempotency_prefix: Optional[str] = None,
+        return_exceptions: bool = False,
+    ) -> List[ChargeResult]:
+        """
+        Create many one-time charges concurrently; results keep the order of `items`.
+
+        Each item holds `create_one_time` keyword arguments (token_id, amount,
+        currency, capture, metadata, idempotency_key, extra fields). Up to
+        `concurrency` requests run at once on worker threads, all sharing this
+        client's connection pool (and one multiplexed connection with
+        `UnivapayClient(..., http2=True)`).
+
+        Every item needs an idempotency key so a failed batch can be re-run
+        safely: `idempotency_prefix` gives items without their own key the key
+        "{prefix}-{index}"; without a prefix, every item must carry its own key.
+
+        All items are always attempted. With `return_exceptions=True`, a failing
+        item yields its exception in place; otherwise UnivapayBatchError is raised
+        after the whole batch has run, carrying the per-item results (charges
+        that were created and the exceptions of those that were not).
+        """
+        if not isinstance(concurrency, int) or concurrency <= 0:
+            raise ValueError("concurrency must be a positive integer.")
+        if not idempotency_prefix and not all(item.get("idempotency_key") for item in items):
+            raise ValueError(
+                "idempotency_prefix is required unless every item has its own idempotency_key."
+            )
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.create_many() count={len(items)} concurrency={concurrency} "
+                f"idempotency_prefix={idempotency_prefix}"
+            )
+
+        def _one(i: int, item: Mapping[str, Any]) -> ChargeResult:
+            kwargs = dict(item)
+            if not kwargs.get("idempotency_key"):
+                kwargs["idempotency_key"] = f"{idempotency_prefix}-{i}"
+            try:
+                return self.create_one_time(**kwargs)
+            except Exception as e:
+                return e
+
+        results: List[ChargeResult]
+        if concurrency == 1 or len(items) <= 1:
+            results = [_one(i, item) for i, item in enumerate(items)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as pool:
+                results = list(pool.map(_one, range(len(items)), items))
+        if not return_exceptions:
+            first = next((r for r in results if isinstance(r, Exception)), None)
+            if first is not None:
+                raise UnivapayBatchError(results) from first
+        return results
+
     # ----------------------- read -----------------------
 
     def get(self, charge_id: str, *, polling: bool = False) -> Charge:
@@ -148,9 +254,27 @@ class ChargesAPI:
         Retrieve a charge. If polling=True, server blocks until a terminal state when supported.
         """
         _validate_id("charge_id", charge_id)
-        dprint("charges.get()", {"charge_id": charge_id, "polling": polling})
-        resp = self.client.get(f"{_charges_base(self.client)}/{charge_id}", polling=polling)
-        return Charge.model_validate(resp)
+        return self._get_unchecked(charge_id, polling)
+
+    def _get_unchecked(self, charge_id: str, polling: bool = False) -> Charge:
+        # `get` without re-validating the id; waiters validate once up front
+        return Charge.model_validate(self._get_dict(charge_id, polling))
+
+    def _get_dict(self, charge_id: str, polling: bool = False) -> Dict[str, Any]:
+        # Unvalidated response dict: poll loops only need its "status"
+        if _debug.DEBUG_ENABLED:
+            dprint(f"charges.get() charge_id={charge_id} polling={polling}")
+        return self.client.get(f"{self._base}/{charge_id}", polling=polling)
+
+    def get_raw(self, charge_id: str, *, polling: bool = False) -> bytes:
+        """
+        Retrieve a charge as the raw JSON bytes returned by the API (no model validation).
+        Handy for proxy endpoints that forward the body as-is; use `get` for a typed Charge.
+        """
+        _validate_id("charge_id", charge_id)
+        if _debug.DEBUG_ENABLED:
+            dprint(f"charges.get_raw() charge_id={charge_id} polling={polling}")
+        return self.client.get_raw(f"{self._base}/{charge_id}", polling=polling)
 
     # ----------------------- waiter -----------------------
 
@@ -161,40 +285,140 @@ class ChargesAPI:
         server_polling: bool = True,
         timeout_s: int = 90,
         interval_s: float = 2.0,
+        max_interval_s: float = 30.0,
+        jitter: bool = True,
     ) -> Charge:
         """
         Block until the charge reaches a terminal state.
 
         If server_polling=True, perform a single GET with polling=true.
-        Otherwise, poll client-side every interval_s until timeout_s is reached.
+        Otherwise, poll client-side until timeout_s is reached, starting at
+        interval_s and doubling the wait up to max_interval_s (with jitter).
         """
         _validate_id("charge_id", charge_id)
-        if timeout_s <= 0 or interval_s <= 0:
-            raise ValueError("timeout_s and interval_s must be positive.")
-
-        dprint("charges.wait_until_terminal()", {
-            "charge_id": charge_id,
-            "server_polling": server_polling,
-            "timeout_s": timeout_s,
-            "interval_s": interval_s,
-        })
+        if timeout_s <= 0 or interval_s <= 0 or max_interval_s <= 0:
+            raise ValueError("timeout_s, interval_s and max_interval_s must be positive.")
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.wait_until_terminal() charge_id={charge_id} "
+                f"server_polling={server_polling} timeout_s={timeout_s} "
+                f"interval_s={interval_s} max_interval_s={max_interval_s}"
+            )
+
+        # Concurrent waiters on the same resource share one poll loop; a waiter with
+        # a longer timeout keeps polling if the shared result is still non-terminal
+        return coalesced(
+            ("charge", quota_key(self.client), charge_id, server_polling),
+            lambda remaining: self._wait_terminal(
+                charge_id, server_polling, remaining, interval_s, max_interval_s, jitter
+            ),
+            timeout_s,
+            lambda: self._get_unchecked(charge_id),
+            lambda ch: server_polling or _is_terminal(ch.status),
+        )
 
+    def _wait_terminal(
+        self,
+        charge_id: str,
+        server_polling: bool,
+        timeout_s: float,
+        interval_s: float,
+        max_interval_s: float,
+        jitter: bool,
+    ) -> Charge:
         if server_polling:
-            ch = self.get(charge_id, polling=True)
-            dprint("charges.wait_until_terminal: server-polling returned", {"status": ch.status})
+            ch = self._get_unchecked(charge_id, True)
+            if _debug.DEBUG_ENABLED:
+                dprint(f"charges.wait_until_terminal: server-polling returned status={ch.status}")
             return ch
 
-        deadline = time.time() + timeout_s
-        while True:
-            ch = self.get(charge_id)
-            status_norm = (ch.status or "").lower()
-            if status_norm in _TERMINAL_STATES:
-                dprint("charges.wait_until_terminal -> terminal", {"status": ch.status})
-                return ch
-            if time.time() >= deadline:
-                dprint("charges.wait_until_terminal -> timeout", {"last_status": ch.status})
-                return ch
-            time.sleep(interval_s)
+        # Polls read "status" from the raw dict; only the charge we return is validated
+        deadline = time.monotonic() + timeout_s
+        raw = self._get_dict(charge_id)
+        if _is_terminal(raw.get("status")):
+            if _debug.DEBUG_ENABLED:
+                dprint(f"charges.wait_until_terminal -> terminal status={raw.get('status')}")
+            return Charge.model_validate(raw)
+
+        key = quota_key(self.client)
+        for delay in backoff_sleeps(interval_s, max_interval_s, deadline, jitter=jitter, key=key):
+            time.sleep(delay)
+            cur = observed_get(key, lambda: self._get_dict(charge_id))
+            if cur is None:
+                continue  # throttled (429); the scheduler widens the next wait
+            raw = cur
+            if _is_terminal(raw.get("status")):
+                if _debug.DEBUG_ENABLED:
+                    dprint(f"charges.wait_until_terminal -> terminal status={raw.get('status')}")
+                return Charge.model_validate(raw)
+
+        if _debug.DEBUG_ENABLED:
+            dprint(f"charges.wait_until_terminal -> timeout last_status={raw.get('status')}")
+        return Charge.model_validate(raw)
+
+    async def await_until_terminal(
+        self,
+        charge_id: str,
+        *,
+        server_polling: bool = True,
+        timeout_s: int = 90,
+        interval_s: float = 2.0,
+        max_interval_s: float = 30.0,
+        jitter: bool = True,
+    ) -> Charge:
+        """
+        Async variant of `wait_until_terminal` for use inside an event loop.
+
+        Each GET runs in a worker thread and the waits use asyncio.sleep, so
+        many charges can be awaited concurrently (e.g. with asyncio.gather).
+        """
+        _validate_id("charge_id", charge_id)
+        if timeout_s <= 0 or interval_s <= 0 or max_interval_s <= 0:
+            raise ValueError("timeout_s, interval_s and max_interval_s must be positive.")
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.await_until_terminal() charge_id={charge_id} "
+                f"server_polling={server_polling} timeout_s={timeout_s} "
+                f"interval_s={interval_s} max_interval_s={max_interval_s}"
+            )
+
+        # Concurrent awaiters on the same resource share one polling task
+        return await coalesced_async(
+            ("charge", quota_key(self.client), charge_id, server_polling),
+            lambda remaining: self._await_terminal(
+                charge_id, server_polling, remaining, interval_s, max_interval_s, jitter
+            ),
+            timeout_s,
+            lambda: asyncio.to_thread(self._get_unchecked, charge_id),
+            lambda ch: server_polling or _is_terminal(ch.status),
+        )
+
+    async def _await_terminal(
+        self,
+        charge_id: str,
+        server_polling: bool,
+        timeout_s: float,
+        interval_s: float,
+        max_interval_s: float,
+        jitter: bool,
+    ) -> Charge:
+        if server_polling:
+            return await asyncio.to_thread(self._get_unchecked, charge_id, True)
+
+        raw = await poll_until_async(
+            lambda: self._get_dict(charge_id),
+            lambda d: _is_terminal(d.get("status")),
+            interval_s=interval_s,
+            max_interval_s=max_interval_s,
+            deadline=time.monotonic() + timeout_s,
+            jitter=jitter,
+            key=quota_key(self.client),
+        )
+        if _debug.DEBUG_ENABLED:
+            dprint(f"charges.await_until_terminal -> done status={raw.get('status')}")
+        return Charge.model_validate(raw)
 
     # ----------------------- actions -----------------------
 
@@ -212,15 +436,14 @@ class ChargesAPI:
         if amount is not None:
             _validate_amount(amount)
 
-        dprint("charges.refund()", {
-            "charge_id": charge_id,
-            "amount": amount,
-            "idempotency_key_present": bool(idempotency_key),
-        })
-
-        path = f"{_charges_base(self.client)}/{charge_id}/refunds"
+        path = f"{self._base}/{charge_id}/refunds"
         body: Dict[str, Any] = {"amount": amount} if amount is not None else {}
-        djson("charges.refund body", body)
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.refund() charge_id={charge_id} amount={amount} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("charges.refund body", body)
         resp = self.client.post(path, json=body, idempotency_key=idempotency_key)
         return Refund.model_validate(resp)
 
@@ -229,10 +452,15 @@ class ChargesAPI:
         Capture a previously authorized charge (if your account flow supports auth/capture).
         """
         _validate_id("charge_id", charge_id)
-        dprint("charges.capture()", {"charge_id": charge_id, "idempotency_key_present": bool(idempotency_key)})
-        path = f"{_charges_base(self.client)}/{charge_id}/capture"
-        djson("charges.capture body", {**extra} if extra else {})
-        resp = self.client.post(path, json={**(extra or {})}, idempotency_key=idempotency_key)
+        path = f"{self._base}/{charge_id}/capture"
+        # `extra` is already a fresh dict owned by this call; send it as-is
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.capture() charge_id={charge_id} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("charges.capture body", extra)
+        resp = self.client.post(path, json=extra, idempotency_key=idempotency_key)
         return Charge.model_validate(resp)
 
     def cancel(self, charge_id: str, *, idempotency_key: Optional[str] = None, **extra: Any) -> Charge:
@@ -240,8 +468,13 @@ class ChargesAPI:
         Cancel (void) a charge. Route name may vary by capture flow; adjust if needed.
         """
         _validate_id("charge_id", charge_id)
-        dprint("charges.cancel()", {"charge_id": charge_id, "idempotency_key_present": bool(idempotency_key)})
-        path = f"{_charges_base(self.client)}/{charge_id}/cancel"
-        djson("charges.cancel body", {**extra} if extra else {})
-        resp = self.client.post(path, json={**(extra or {})}, idempotency_key=idempotency_key)
+        path = f"{self._base}/{charge_id}/cancel"
+        # `extra` is already a fresh dict owned by this call; send it as-is
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"charges.cancel() charge_id={charge_id} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("charges.cancel body", extra)
+        resp = self.client.post(path, json=extra, idempotency_key=idempotency_key)
         return Charge.model_validate(resp)
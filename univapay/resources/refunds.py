@@ -1,17 +1,28 @@
 from __future__ import annotations
+import asyncio
 import time
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 from ..client import UnivapayClient
+from .. import debug as _debug
 from ..debug import dprint, djson
 from ..models import Refund
+from ._polling import (
+    backoff_sleeps,
+    coalesced,
+    coalesced_async,
+    observed_get,
+    poll_until_async,
+    quota_key,
+)
 
 # ------------------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------------------
 
-def _base(client: UnivapayClient, charge_id: str) -> str:
-    return f"{client._path('charges')}/{charge_id}/refunds"
+def _charges_base(client: UnivapayClient) -> str:
+    return client._path("charges")
 
 def _validate_id(name: str, value: str) -> None:
     if not isinstance(value, str) or not value.strip():
@@ -22,9 +33,23 @@ def _validate_amount(amount: int) -> None:
         raise ValueError("amount must be a positive integer (minor units).")
 
 # Terminal-ish statuses (case-insensitive; broad to be safe)
-_REFUND_TERMINAL = {s.lower() for s in ("successful", "failed", "error", "canceled", "cancelled")}
+_REFUND_TERMINAL = frozenset(("successful", "failed", "error", "canceled", "cancelled"))
+# Case variants the API might send, matched without normalizing
+_REFUND_TERMINAL_FAST = frozenset(
+    v for s in _REFUND_TERMINAL for v in (s, s.upper(), s.capitalize())
+)
+
+@lru_cache(maxsize=64)
+def _is_terminal_slow(status: str) -> bool:
+    return status.strip().lower() in _REFUND_TERMINAL
+
 def _is_terminal(status: Optional[str]) -> bool:
-    return bool(status and status.strip().lower() in _REFUND_TERMINAL)
+    # Pollers pass the unvalidated "status" from the raw dict, so it may be any JSON value
+    if not status or not isinstance(status, str):
+        return False
+    if status in _REFUND_TERMINAL_FAST:
+        return True
+    return _is_terminal_slow(status)
 
 # ------------------------------------------------------------------------------
 # API
@@ -41,8 +66,14 @@ class RefundsAPI:
       - Wait until a refund reaches a terminal status.
     """
 
+    __slots__ = ("client", "_charges_base")
+
     def __init__(self, client: UnivapayClient):
         self.client = client
+        self._charges_base = _charges_base(client)  # fixed per client; resolved once
+
+    def _refunds_path(self, charge_id: str) -> str:
+        return f"{self._charges_base}/{charge_id}/refunds"
 
     # ---- Create ----
     def create(
@@ -76,25 +107,21 @@ class RefundsAPI:
         if amount is not None:
             _validate_amount(amount)
 
-        payload: Dict[str, Any] = {}
-        if amount is not None:
-            payload["amount"] = amount
-        if reason:
-            payload["reason"] = reason
-        payload.update(extra)
-
-        dprint(
-            "refunds.create()",
-            {
-                "charge_id": charge_id,
-                "amount": amount,
-                "reason": reason,
-                "idempotency_key_present": bool(idempotency_key),
-            },
-        )
-        djson("refunds.create body", payload)
+        payload: Dict[str, Any] = {
+            k: v for k, v in (("amount", amount), ("reason", reason or None)) if v is not None
+        }
+        if extra:
+            payload.update(extra)
 
-        resp = self.client.post(_base(self.client, charge_id), json=payload, idempotency_key=idempotency_key)
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"refunds.create() charge_id={charge_id} amount={amount} reason={reason} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("refunds.create body", payload)
+
+        path = self._refunds_path(charge_id)
+        resp = self.client.post(path, json=payload, idempotency_key=idempotency_key)
         return Refund.model_validate(resp)
 
     def create_full_refund(
@@ -108,7 +135,8 @@ class RefundsAPI:
         """
         Convenience: request a full refund (omit `amount`).
         """
-        dprint("refunds.create_full_refund()", {"charge_id": charge_id})
+        if _debug.DEBUG_ENABLED:
+            dprint(f"refunds.create_full_refund() charge_id={charge_id}")
         return self.create(
             charge_id,
             amount=None,
@@ -129,7 +157,8 @@ class RefundsAPI:
         """
         Convenience: request a partial refund (requires `amount`).
         """
-        dprint("refunds.create_partial_refund()", {"charge_id": charge_id, "amount": amount})
+        if _debug.DEBUG_ENABLED:
+            dprint(f"refunds.create_partial_refund() charge_id={charge_id} amount={amount}")
         _validate_amount(amount)
         return self.create(
             charge_id,
@@ -146,11 +175,17 @@ class RefundsAPI:
         """
         _validate_id("charge_id", charge_id)
         _validate_id("refund_id", refund_id)
+        return self._get_unchecked(charge_id, refund_id, polling)
 
-        path = f"{_base(self.client, charge_id)}/{refund_id}"
-        dprint("refunds.get()", {"charge_id": charge_id, "refund_id": refund_id, "polling": polling})
-        resp = self.client.get(path, polling=polling)
-        return Refund.model_validate(resp)
+    def _get_unchecked(self, charge_id: str, refund_id: str, polling: bool = False) -> Refund:
+        # `get` without re-validating ids; the waiters validate once up front
+        return Refund.model_validate(self._get_dict(charge_id, refund_id, polling))
+
+    def _get_dict(self, charge_id: str, refund_id: str, polling: bool = False) -> Dict[str, Any]:
+        path = f"{self._refunds_path(charge_id)}/{refund_id}"
+        if _debug.DEBUG_ENABLED:
+            dprint(f"refunds.get() charge_id={charge_id} refund_id={refund_id} polling={polling}")
+        return self.client.get(path, polling=polling)
 
     # ---- List ----
     def list(
@@ -176,9 +211,10 @@ class RefundsAPI:
         if extra_params:
             params.update(extra_params)
 
-        dprint("refunds.list()", {"charge_id": charge_id, "params": params})
-        resp = self.client.get(_base(self.client, charge_id), params=params)
-        djson("refunds.list response", resp)
+        resp = self.client.get(self._refunds_path(charge_id), params=params)
+        if _debug.DEBUG_ENABLED:
+            dprint(f"refunds.list() charge_id={charge_id} params={params}")
+            djson("refunds.list response", resp)
         return resp
 
     # ---- Wait until terminal ----
@@ -190,46 +226,144 @@ class RefundsAPI:
         server_polling: bool = True,
         timeout_s: int = 60,
         interval_s: float = 2.0,
+        max_interval_s: float = 30.0,
+        jitter: bool = True,
     ) -> Refund:
         """
         Block until the refund reaches a terminal-ish status.
 
         If server_polling=True, perform a single GET with polling=true.
-        Otherwise, poll client-side every `interval_s` until `timeout_s` is reached.
+        Otherwise, poll client-side until `timeout_s` is reached, starting at
+        `interval_s` and doubling the wait up to `max_interval_s` (with jitter).
         """
         _validate_id("charge_id", charge_id)
         _validate_id("refund_id", refund_id)
-        if timeout_s <= 0 or interval_s <= 0:
-            raise ValueError("timeout_s and interval_s must be positive.")
-
-        dprint(
-            "refunds.wait_until_terminal()",
-            {
-                "charge_id": charge_id,
-                "refund_id": refund_id,
-                "server_polling": server_polling,
-                "timeout_s": timeout_s,
-                "interval_s": interval_s,
-            },
+        if timeout_s <= 0 or interval_s <= 0 or max_interval_s <= 0:
+            raise ValueError("timeout_s, interval_s and max_interval_s must be positive.")
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"refunds.wait_until_terminal() charge_id={charge_id} refund_id={refund_id} "
+                f"server_polling={server_polling} timeout_s={timeout_s} "
+                f"interval_s={interval_s} max_interval_s={max_interval_s}"
+            )
+
+        # Concurrent waiters on the same resource share one poll loop; a waiter with
+        # a longer timeout keeps polling if the shared result is still non-terminal
+        return coalesced(
+            ("refund", quota_key(self.client), charge_id, refund_id, server_polling),
+            lambda remaining: self._wait_terminal(
+                charge_id, refund_id, server_polling, remaining, interval_s, max_interval_s, jitter
+            ),
+            timeout_s,
+            lambda: self._get_unchecked(charge_id, refund_id),
+            lambda r: server_polling or _is_terminal(r.status),
         )
 
+    def _wait_terminal(
+        self,
+        charge_id: str,
+        refund_id: str,
+        server_polling: bool,
+        timeout_s: float,
+        interval_s: float,
+        max_interval_s: float,
+        jitter: bool,
+    ) -> Refund:
         if server_polling:
             # Single blocking call if the API supports server-side polling
-            return self.get(charge_id, refund_id, polling=True)
-
-        # Client-side polling loop
-        deadline = time.time() + timeout_s
-        last = self.get(charge_id, refund_id, polling=False)
-        if _is_terminal(last.status):
-            dprint("refunds.wait_until_terminal: already terminal-ish", {"status": last.status})
-            return last
-
-        while time.time() < deadline:
-            time.sleep(interval_s)
-            last = self.get(charge_id, refund_id, polling=False)
-            if _is_terminal(last.status):
-                dprint("refunds.wait_until_terminal -> terminal-ish", {"status": last.status})
-                return last
-
-        dprint("refunds.wait_until_terminal -> timeout", {"last_status": getattr(last, "status", None)})
-        return last
+            return self._get_unchecked(charge_id, refund_id, True)
+
+        # Client-side polling loop (raw dicts; validate only the refund we return)
+        deadline = time.monotonic() + timeout_s
+        last = self._get_dict(charge_id, refund_id)
+        if _is_terminal(last.get("status")):
+            if _debug.DEBUG_ENABLED:
+                dprint(
+                    "refunds.wait_until_terminal: already terminal-ish "
+                    f"status={last.get('status')}"
+                )
+            return Refund.model_validate(last)
+
+        key = quota_key(self.client)
+        for delay in backoff_sleeps(interval_s, max_interval_s, deadline, jitter=jitter, key=key):
+            time.sleep(delay)
+            cur = observed_get(key, lambda: self._get_dict(charge_id, refund_id))
+            if cur is None:
+                continue  # throttled (429); the scheduler widens the next wait
+            last = cur
+            if _is_terminal(last.get("status")):
+                if _debug.DEBUG_ENABLED:
+                    dprint(
+                        "refunds.wait_until_terminal -> terminal-ish "
+                        f"status={last.get('status')}"
+                    )
+                return Refund.model_validate(last)
+
+        if _debug.DEBUG_ENABLED:
+            dprint(f"refunds.wait_until_terminal -> timeout last_status={last.get('status')}")
+        return Refund.model_validate(last)
+
+    async def await_until_terminal(
+        self,
+        charge_id: str,
+        refund_id: str,
+        *,
+        server_polling: bool = True,
+        timeout_s: int = 60,
+        interval_s: float = 2.0,
+        max_interval_s: float = 30.0,
+        jitter: bool = True,
+    ) -> Refund:
+        """
+        Async variant of `wait_until_terminal` (GETs run in a worker thread,
+        waits use asyncio.sleep).
+        """
+        _validate_id("charge_id", charge_id)
+        _validate_id("refund_id", refund_id)
+        if timeout_s <= 0 or interval_s <= 0 or max_interval_s <= 0:
+            raise ValueError("timeout_s, interval_s and max_interval_s must be positive.")
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"refunds.await_until_terminal() charge_id={charge_id} refund_id={refund_id} "
+                f"server_polling={server_polling} timeout_s={timeout_s} "
+                f"interval_s={interval_s} max_interval_s={max_interval_s}"
+            )
+
+        # Concurrent awaiters on the same resource share one polling task
+        return await coalesced_async(
+            ("refund", quota_key(self.client), charge_id, refund_id, server_polling),
+            lambda remaining: self._await_terminal(
+                charge_id, refund_id, server_polling, remaining, interval_s, max_interval_s, jitter
+            ),
+            timeout_s,
+            lambda: asyncio.to_thread(self._get_unchecked, charge_id, refund_id),
+            lambda r: server_polling or _is_terminal(r.status),
+        )
+
+    async def _await_terminal(
+        self,
+        charge_id: str,
+        refund_id: str,
+        server_polling: bool,
+        timeout_s: float,
+        interval_s: float,
+        max_interval_s: float,
+        jitter: bool,
+    ) -> Refund:
+        if server_polling:
+            return await asyncio.to_thread(self._get_unchecked, charge_id, refund_id, True)
+
+        last = await poll_until_async(
+            lambda: self._get_dict(charge_id, refund_id),
+            lambda d: _is_terminal(d.get("status")),
+            interval_s=interval_s,
+            max_interval_s=max_interval_s,
+            deadline=time.monotonic() + timeout_s,
+            jitter=jitter,
+            key=quota_key(self.client),
+        )
+        if _debug.DEBUG_ENABLED:
+            dprint(f"refunds.await_until_terminal -> done status={last.get('status')}")
+        return Refund.model_validate(last)
@@ -1,10 +1,22 @@
 from __future__ import annotations
+import asyncio
 import time
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 from ..client import UnivapayClient
+from .. import debug as _debug
 from ..debug import dprint, djson
-from ..models import SubscriptionCreate, Subscription
+from ..errors import UnivapayHTTPError
+from ..models import Subscription
+from ._polling import (
+    backoff_sleeps,
+    coalesced,
+    coalesced_async,
+    observed_get,
+    poll_until_async,
+    quota_key,
+)
 
 
 def _subs_base(client: UnivapayClient) -> str:
@@ -12,25 +24,36 @@ def _subs_base(client: UnivapayClient) -> str:
 
 
 # Terminal-ish statuses (case-insensitive). Includes "current" seen in logs.
-_SUB_TERMINAL = {
-    s.lower()
-    for s in (
-        "current",
-        "active",
-        "canceled",
-        "cancelled",
-        "failed",
-        "error",
-        "paused",
-        "suspended",
-        "inactive",
-        "completed",
-    )
-}
+_SUB_TERMINAL = frozenset((
+    "current",
+    "active",
+    "canceled",
+    "cancelled",
+    "failed",
+    "error",
+    "paused",
+    "suspended",
+    "inactive",
+    "completed",
+))
+
+
+# Case variants the API might send, matched without normalizing
+_SUB_TERMINAL_FAST = frozenset(v for s in _SUB_TERMINAL for v in (s, s.upper(), s.capitalize()))
+
+
+@lru_cache(maxsize=64)
+def _is_terminal_slow(status: str) -> bool:
+    return status.strip().lower() in _SUB_TERMINAL
 
 
 def _is_terminal(status: Optional[str]) -> bool:
-    return bool(status and status.strip().lower() in _SUB_TERMINAL)
+    # Pollers pass the unvalidated "status" from the raw dict, so it may be any JSON value
+    if not status or not isinstance(status, str):
+        return False
+    if status in _SUB_TERMINAL_FAST:
+        return True
+    return _is_terminal_slow(status)
 
 
 # ------------------------ validation helpers ------------------------
@@ -40,11 +63,13 @@ def _validate_amount(amount: int) -> None:
         raise ValueError("amount must be a positive integer (minor units).")
 
 def _validate_currency(currency: str) -> str:
+    if currency == "jpy":  # default; skip the strip/lower copies
+        return currency
     if not isinstance(currency, str) or len(currency.strip()) < 3:
         raise ValueError("currency must be a valid ISO code string, e.g., 'jpy'.")
     return currency.strip().lower()
 
-_VALID_PERIODS = {
+_VALID_PERIODS = frozenset((
     "daily",
     "weekly",
     "biweekly",
@@ -54,31 +79,41 @@ _VALID_PERIODS = {
     "semiannually",
     "annually",
     "yearly",
+))
+# Values that are already what the API expects ("yearly" still maps to "annually")
+_CANONICAL_PERIODS = _VALID_PERIODS - {"yearly"}
+
+_PERIOD_ALIASES = {
+    "year": "annually",
+    "yearly": "annually",
+    "annual": "annually",
+    "annually": "annually",
+    "biweekly": "biweekly",
+    "bi-weekly": "biweekly",
+    "bimonthly": "bimonthly",
+    "bi-monthly": "bimonthly",
+    "semiannual": "semiannually",
+    "semi-annual": "semiannually",
 }
 
 def _validate_period(period: str) -> str:
+    if isinstance(period, str) and period in _CANONICAL_PERIODS:
+        return period
     if not isinstance(period, str) or not period.strip():
         raise ValueError("period is required (e.g., 'monthly', 'semiannually').")
     raw = period.strip().lower().replace(" ", "")
-    alias_map = {
-        "year": "annually",
-        "yearly": "annually",
-        "annual": "annually",
-        "annually": "annually",
-        "biweekly": "biweekly",
-        "bi-weekly": "biweekly",
-        "bimonthly": "bimonthly",
-        "bi-monthly": "bimonthly",
-        "semiannual": "semiannually",
-        "semi-annual": "semiannually",
-    }
-    p = alias_map.get(raw, raw)
+    p = _PERIOD_ALIASES.get(raw, raw)
     if p not in _VALID_PERIODS:
         raise ValueError(f"period must be one of {sorted(_VALID_PERIODS)}")
     if p == "yearly":
         p = "annually"
     return p
 
+def _validate_start_on(start_on: str) -> str:
+    if not isinstance(start_on, str):
+        raise ValueError("start_on must be an ISO date string (YYYY-MM-DD).")
+    return start_on.strip()
+
 def _validate_token(token_id: str) -> None:
     if not token_id or not isinstance(token_id, str):
         raise ValueError("token_id is required and must be a non-empty string.")
@@ -98,9 +133,13 @@ class SubscriptionsAPI:
     - Cancel with `cancel(subscription_id, ...)`.
     """
 
+    __slots__ = ("client", "_base")
+
     def __init__(self, client: UnivapayClient):
         self.client = client
-        dprint("subscriptions.__init__()", {"base_path": _subs_base(self.client)})
+        self._base = _subs_base(client)  # fixed per client; resolved once
+        if _debug.DEBUG_ENABLED:
+            dprint(f"subscriptions.__init__() base_path={self._base}")
 
     # ------------------------ create ------------------------
 
@@ -122,32 +161,29 @@ class SubscriptionsAPI:
         currency = _validate_currency(currency)
         period = _validate_period(period)
 
-        dprint(
-            "subscriptions.create()",
-            {
-                "token_id": token_id,
-                "amount": amount,
-                "period": period,
-                "currency": currency,
-                "start_on": start_on,
-                "idempotency_key_present": bool(idempotency_key),
-            },
-        )
-
-        body = SubscriptionCreate(
-            transaction_token_id=token_id,
-            amount=amount,
-            currency=currency,
-            period=period,
-            start_on=start_on,
-        ).model_dump(by_alias=True, exclude_none=True)
-
+        # Same shape as SubscriptionCreate(...).model_dump(by_alias=True, exclude_none=True);
+        # inputs are already validated above, so skip the throwaway model.
+        body: Dict[str, Any] = {
+            "transaction_token_id": token_id.strip(),
+            "amount": amount,
+            "currency": currency,
+            "period": period,
+        }
+        if start_on is not None:
+            body["start_on"] = _validate_start_on(start_on)
         if metadata:
             body["metadata"] = metadata
-        body.update(extra or {})
-
-        djson("subscriptions.create body", body)
-        resp = self.client.post(_subs_base(self.client), json=body, idempotency_key=idempotency_key)
+        if extra:
+            body.update(extra)
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"subscriptions.create() token_id={token_id} amount={amount} period={period} "
+                f"currency={currency} start_on={start_on} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("subscriptions.create body", body)
+        resp = self.client.post(self._base, json=body, idempotency_key=idempotency_key)
         return Subscription.model_validate(resp)
 
     # ------------------------ read ------------------------
@@ -155,9 +191,16 @@ class SubscriptionsAPI:
     def get(self, subscription_id: str, *, polling: bool = False) -> Subscription:
         """Retrieve a subscription. If polling=True, server may block until steady/terminal state."""
         _validate_id("subscription_id", subscription_id)
-        dprint("subscriptions.get()", {"subscription_id": subscription_id, "polling": polling})
-        resp = self.client.get(f"{_subs_base(self.client)}/{subscription_id}", polling=polling)
-        return Subscription.model_validate(resp)
+        return self._get_unchecked(subscription_id, polling)
+
+    def _get_unchecked(self, subscription_id: str, polling: bool = False) -> Subscription:
+        # `get` minus id validation, for the waiters' repeated polls
+        return Subscription.model_validate(self._get_dict(subscription_id, polling))
+
+    def _get_dict(self, subscription_id: str, polling: bool = False) -> Dict[str, Any]:
+        if _debug.DEBUG_ENABLED:
+            dprint(f"subscriptions.get() subscription_id={subscription_id} polling={polling}")
+        return self.client.get(f"{self._base}/{subscription_id}", polling=polling)
 
     # ------------------------ waiter ------------------------
 
@@ -168,6 +211,8 @@ class SubscriptionsAPI:
         server_polling: bool = False,  # default False to avoid long blocks by default
         timeout_s: int = 60,
         interval_s: float = 2.0,
+        max_interval_s: float = 30.0,
+        jitter: bool = True,
     ) -> Subscription:
         """
         Return once the subscription is in a terminal-ish state.
@@ -175,49 +220,151 @@ class SubscriptionsAPI:
         Flow:
           1) Quick GET without polling; if already terminal-ish (e.g., 'current'), return immediately.
           2) If server_polling=True, do a single GET with polling=true (server may block).
-          3) Else, client-side poll until terminal or timeout.
+          3) Else, client-side poll until terminal or timeout, starting at interval_s and
+             doubling the wait up to max_interval_s (with jitter).
         """
         _validate_id("subscription_id", subscription_id)
-        if timeout_s <= 0 or interval_s <= 0:
-            raise ValueError("timeout_s and interval_s must be positive.")
-
-        dprint(
-            "subscriptions.wait_until_terminal()",
-            {
-                "subscription_id": subscription_id,
-                "server_polling": server_polling,
-                "timeout_s": timeout_s,
-                "interval_s": interval_s,
-            },
+        if timeout_s <= 0 or interval_s <= 0 or max_interval_s <= 0:
+            raise ValueError("timeout_s, interval_s and max_interval_s must be positive.")
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"subscriptions.wait_until_terminal() subscription_id={subscription_id} "
+                f"server_polling={server_polling} timeout_s={timeout_s} "
+                f"interval_s={interval_s} max_interval_s={max_interval_s}"
+            )
+
+        # Concurrent waiters on the same resource share one poll loop; a waiter with
+        # a longer timeout keeps polling if the shared result is still non-terminal
+        return coalesced(
+            ("subscription", quota_key(self.client), subscription_id, server_polling),
+            lambda remaining: self._wait_terminal(
+                subscription_id, server_polling, remaining, interval_s, max_interval_s, jitter
+            ),
+            timeout_s,
+            lambda: self._get_unchecked(subscription_id),
+            lambda sub: server_polling or _is_terminal(sub.status),
         )
 
-        # Step 1: quick check
-        sub = self.get(subscription_id, polling=False)
-        if _is_terminal(sub.status):
-            dprint("subscriptions.wait_until_terminal: already terminal-ish", {"status": sub.status})
-            return sub
+    def _wait_terminal(
+        self,
+        subscription_id: str,
+        server_polling: bool,
+        timeout_s: float,
+        interval_s: float,
+        max_interval_s: float,
+        jitter: bool,
+    ) -> Subscription:
+        # Step 1: quick check (polls read the raw dict; only the result is validated)
+        raw = self._get_dict(subscription_id)
+        if _is_terminal(raw.get("status")):
+            if _debug.DEBUG_ENABLED:
+                dprint(
+                    "subscriptions.wait_until_terminal: already terminal-ish "
+                    f"status={raw.get('status')}"
+                )
+            return Subscription.model_validate(raw)
 
         # Step 2: server polling if requested
         if server_polling:
-            sub_p = self.get(subscription_id, polling=True)
-            dprint("subscriptions.wait_until_terminal: server-polling returned", {"status": sub_p.status})
+            sub_p = self._get_unchecked(subscription_id, True)
+            if _debug.DEBUG_ENABLED:
+                dprint(
+                    "subscriptions.wait_until_terminal: server-polling returned "
+                    f"status={sub_p.status}"
+                )
             return sub_p
 
         # Step 3: client-side loop
-        deadline = time.time() + timeout_s
-        last = sub
-        while time.time() < deadline:
-            time.sleep(interval_s)
-            last = self.get(subscription_id, polling=False)
-            if _is_terminal(last.status):
-                dprint("subscriptions.wait_until_terminal: reached terminal-ish", {"status": last.status})
-                return last
-
-        dprint(
-            "subscriptions.wait_until_terminal timeout",
-            {"subscription_id": subscription_id, "last_status": getattr(last, "status", None)},
+        deadline = time.monotonic() + timeout_s
+        last = raw
+        key = quota_key(self.client)
+        for delay in backoff_sleeps(interval_s, max_interval_s, deadline, jitter=jitter, key=key):
+            time.sleep(delay)
+            cur = observed_get(key, lambda: self._get_dict(subscription_id))
+            if cur is None:
+                continue  # throttled (429); the scheduler widens the next wait
+            last = cur
+            if _is_terminal(last.get("status")):
+                if _debug.DEBUG_ENABLED:
+                    dprint(
+                        "subscriptions.wait_until_terminal: reached terminal-ish "
+                        f"status={last.get('status')}"
+                    )
+                return Subscription.model_validate(last)
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"subscriptions.wait_until_terminal timeout subscription_id={subscription_id} "
+                f"last_status={last.get('status')}"
+            )
+        return Subscription.model_validate(last)
+
+    async def await_until_terminal(
+        self,
+        subscription_id: str,
+        *,
+        server_polling: bool = False,
+        timeout_s: int = 60,
+        interval_s: float = 2.0,
+        max_interval_s: float = 30.0,
+        jitter: bool = True,
+    ) -> Subscription:
+        """
+        Async variant of `wait_until_terminal` (same flow; GETs run in a worker
+        thread, waits use asyncio.sleep).
+        """
+        _validate_id("subscription_id", subscription_id)
+        if timeout_s <= 0 or interval_s <= 0 or max_interval_s <= 0:
+            raise ValueError("timeout_s, interval_s and max_interval_s must be positive.")
+
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"subscriptions.await_until_terminal() subscription_id={subscription_id} "
+                f"server_polling={server_polling} timeout_s={timeout_s} "
+                f"interval_s={interval_s} max_interval_s={max_interval_s}"
+            )
+
+        # Concurrent awaiters on the same resource share one polling task
+        return await coalesced_async(
+            ("subscription", quota_key(self.client), subscription_id, server_polling),
+            lambda remaining: self._await_terminal(
+                subscription_id, server_polling, remaining, interval_s, max_interval_s, jitter
+            ),
+            timeout_s,
+            lambda: asyncio.to_thread(self._get_unchecked, subscription_id),
+            lambda sub: server_polling or _is_terminal(sub.status),
         )
-        return last
+
+    async def _await_terminal(
+        self,
+        subscription_id: str,
+        server_polling: bool,
+        timeout_s: float,
+        interval_s: float,
+        max_interval_s: float,
+        jitter: bool,
+    ) -> Subscription:
+        raw = await asyncio.to_thread(self._get_dict, subscription_id)
+        if _is_terminal(raw.get("status")):
+            return Subscription.model_validate(raw)
+
+        if server_polling:
+            return await asyncio.to_thread(self._get_unchecked, subscription_id, True)
+
+        last = await poll_until_async(
+            lambda: self._get_dict(subscription_id),
+            lambda d: _is_terminal(d.get("status")),
+            interval_s=interval_s,
+            max_interval_s=max_interval_s,
+            deadline=time.monotonic() + timeout_s,
+            jitter=jitter,
+            last=raw,
+            key=quota_key(self.client),
+        )
+        if _debug.DEBUG_ENABLED:
+            dprint(f"subscriptions.await_until_terminal -> done status={last.get('status')}")
+        return Subscription.model_validate(last)
 
     # ------------------------ actions ------------------------
 
@@ -236,31 +383,32 @@ class SubscriptionsAPI:
         Fallback: PATCH /subscriptions/{id} with {'termination_mode': 'immediate'|'on_next_payment'}
         """
         _validate_id("subscription_id", subscription_id)
-        dprint(
-            "subscriptions.cancel()",
-            {"subscription_id": subscription_id, "idempotency_key_present": bool(idempotency_key)},
-        )
-        base = _subs_base(self.client)
-        path = f"{base}/{subscription_id}/cancel"
-        body = {**(extra or {})}
+        sub_path = f"{self._base}/{subscription_id}"
+        # `extra` is a fresh dict owned by this call: use it as the body for both attempts
+        body = extra
         if termination_mode:
             body.setdefault("termination_mode", termination_mode)
-        djson("subscriptions.cancel body", body if body else {})
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                f"subscriptions.cancel() subscription_id={subscription_id} "
+                f"idempotency_key_present={bool(idempotency_key)}"
+            )
+            djson("subscriptions.cancel body", body)
         try:
-            resp = self.client.post(path, json=body, idempotency_key=idempotency_key)
+            resp = self.client.post(
+                f"{sub_path}/cancel", json=body, idempotency_key=idempotency_key
+            )
             return Subscription.model_validate(resp)
-        except Exception as e:
+        except UnivapayHTTPError as e:
             # Fallback for accounts without /cancel endpoint
-            try:
-                from ..errors import UnivapayHTTPError  # local import to avoid cycle
-                not_found = isinstance(e, UnivapayHTTPError) and e.status in (404, 405)
-            except Exception:
-                not_found = False
-            if not_found:
-                dprint("subscriptions.cancel fallback -> PATCH", {"subscription_id": subscription_id})
-                patch_body: Dict[str, Any] = {**(extra or {})}
-                patch_body.setdefault("termination_mode", termination_mode or "immediate")
-                djson("subscriptions.cancel PATCH body", patch_body)
-                resp2 = self.client.patch(f"{base}/{subscription_id}", json=patch_body, idempotency_key=idempotency_key)
+            if e.status in (404, 405):
+                body.setdefault("termination_mode", "immediate")
+                if _debug.DEBUG_ENABLED:
+                    dprint(
+                        "subscriptions.cancel fallback -> PATCH "
+                        f"subscription_id={subscription_id}"
+                    )
+                    djson("subscriptions.cancel PATCH body", body)
+                resp2 = self.client.patch(sub_path, json=body, idempotency_key=idempotency_key)
                 return Subscription.model_validate(resp2)
             raise
@@ -3,6 +3,7 @@ from typing import Optional
 
 from ..client import UnivapayClient
 from ..errors import UnivapayHTTPError
+from .. import debug as _debug
 from ..debug import dprint, djson
 from ..models import TransactionToken
 
@@ -25,9 +26,13 @@ class TokensAPI:
     - Use this API to fetch token details server-side when needed (e.g., auditing).
     """
 
+    __slots__ = ("client", "_base")
+
     def __init__(self, client: UnivapayClient):
         self.client = client
-        dprint("tokens.__init__()", {"base_path": _tokens_base(self.client)})
+        self._base = _tokens_base(client)  # fixed per client; resolved once
+        if _debug.DEBUG_ENABLED:
+            dprint(f"tokens.__init__() base_path={self._base}")
 
     def get(self, token_id: str) -> TransactionToken:
         """
@@ -51,9 +56,10 @@ class TokensAPI:
             If the HTTP call fails.
         """
         _validate_id("token_id", token_id)
-        dprint("tokens.get()", {"token_id": token_id})
-        resp = self.client.get(f"{_tokens_base(self.client)}/{token_id}")
-        djson("tokens.get response", resp)
+        resp = self.client.get(f"{self._base}/{token_id}")
+        if _debug.DEBUG_ENABLED:
+            dprint(f"tokens.get() token_id={token_id}")
+            djson("tokens.get response", resp)
         return TransactionToken.model_validate(resp)
 
     def try_get(self, token_id: str) -> Optional[TransactionToken]:
@@ -62,12 +68,15 @@ class TokensAPI:
         Propagates other HTTP errors.
         """
         _validate_id("token_id", token_id)
-        dprint("tokens.try_get()", {"token_id": token_id})
+        if _debug.DEBUG_ENABLED:
+            dprint(f"tokens.try_get() token_id={token_id}")
         try:
             return self.get(token_id)
         except UnivapayHTTPError as e:
             if e.status == 404:
-                dprint("tokens.try_get: not found", {"token_id": token_id})
+                if _debug.DEBUG_ENABLED:
+                    dprint(f"tokens.try_get: not found token_id={token_id}")
                 return None
-            dprint("tokens.try_get: error", {"status": e.status})
+            if _debug.DEBUG_ENABLED:
+                dprint(f"tokens.try_get: error status={e.status}")
             raise
@@ -2,13 +2,17 @@
 from __future__ import annotations
 
 import hmac
-import hashlib
-import json
+import re
+import threading
 import time
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
 from pydantic import BaseModel, Field, ConfigDict
 
+from .. import _json
+from .. import debug as _debug
 from ..debug import dprint, djson
 
 
@@ -51,45 +55,85 @@ _SIGNATURE_HEADER_CANDIDATES: Tuple[str, ...] = (
     "X-Hub-Signature",
 )
 
-def _get_header(headers: Mapping[str, str], name: str) -> Optional[str]:
-    for k, v in headers.items():
-        if k.lower() == name.lower():
-            return v
-    return None
+# lowercased name -> (priority, display name), computed once at import
+_SIGNATURE_HEADER_RANK: Dict[str, Tuple[int, str]] = {
+    name.lower(): (i, name) for i, name in enumerate(_SIGNATURE_HEADER_CANDIDATES)
+}
+
+_SIGNATURE_HEADER_TOP_LC = _SIGNATURE_HEADER_CANDIDATES[0].lower()
 
 def _find_sig_header(headers: Mapping[str, str], header_name: Optional[str]) -> Tuple[str, str]:
     """
     Return (value, name_found). Raise if not present.
     """
+    # Fast path: the mapping's own .get() is O(1) for exact-case dicts and already
+    # case-insensitive for framework header objects (Starlette, Werkzeug, Django)
     if header_name:
-        val = _get_header(headers, header_name)
-        if not val:
-            raise WebhookVerificationError(f"signature header '{header_name}' not found")
-        return val, header_name
-
-    for candidate in _SIGNATURE_HEADER_CANDIDATES:
-        val = _get_header(headers, candidate)
+        val = headers.get(header_name)
+        if val:
+            return val, header_name
+    else:
+        top = _SIGNATURE_HEADER_CANDIDATES[0]
+        val = headers.get(top) or headers.get(_SIGNATURE_HEADER_TOP_LC)
         if val:
-            return val, candidate
-    raise WebhookVerificationError("no known signature header found")
+            return val, top  # highest priority, so no scan is needed
 
-def _cmp(a: str, b: str) -> bool:
-    try:
-        return hmac.compare_digest(a, b)
-    except Exception:
-        return False
+    # Otherwise a single pass over the incoming headers with O(1) membership checks
+    if header_name:
+        want = header_name.lower()
+        for k, v in headers.items():
+            if v and k.lower() == want:
+                return v, header_name
+        raise WebhookVerificationError(f"signature header '{header_name}' not found")
 
-def _hmac_hex(secret: Union[str, bytes], payload: Union[str, bytes], algo: str = "sha256") -> str:
+    best: Optional[Tuple[int, str, str]] = None
+    for k, v in headers.items():
+        hit = _SIGNATURE_HEADER_RANK.get(k.lower())
+        if hit is not None and v and (best is None or hit[0] < best[0]):
+            best = (hit[0], v, hit[1])
+            if hit[0] == 0:
+                break  # highest-priority candidate; nothing can beat it
+    if best is None:
+        raise WebhookVerificationError("no known signature header found")
+    return best[1], best[2]
+
+_Secret = Union[str, bytes]
+_Payload = Union[str, bytes, bytearray]
+
+@lru_cache(maxsize=32)
+def _hmac_template(secret: _Secret, algo: str) -> hmac.HMAC:
+    # Keyed (ipad/opad absorbed) HMAC state per secret; callers .copy() it.
+    # Keyed on the secret as given, so a str secret is UTF-8 encoded once, not per verify.
     if isinstance(secret, str):
         secret = secret.encode("utf-8")
+    return hmac.new(secret, digestmod=algo)
+
+def _hmac_digest(
+    secret: _Secret,
+    payload: _Payload,  # bytearray is hashed in place, no bytes() copy
+    algo: str = "sha256",
+    *,
+    prefix: bytes = b"",
+) -> bytes:
+    if not isinstance(secret, (str, bytes)):
+        secret = bytes(secret)  # bytearray/memoryview: hashable cache key
     if isinstance(payload, str):
         payload = payload.encode("utf-8")
     algo = algo.lower().strip()
-    if algo == "sha256":
-        return hmac.new(secret, payload, hashlib.sha256).hexdigest()
-    if algo == "sha1":
-        return hmac.new(secret, payload, hashlib.sha1).hexdigest()
-    raise ValueError(f"unsupported hmac algorithm: {algo}")
+    if algo not in ("sha256", "sha1"):
+        raise ValueError(f"unsupported hmac algorithm: {algo}")
+    # Copying the keyed template skips the per-call key schedule
+    h = _hmac_template(secret, algo).copy()
+    if prefix:
+        h.update(prefix)  # fed separately so the body is never copied into prefix+body
+    h.update(payload)
+    return h.digest()
+
+_DIGEST_SIZES: Dict[str, int] = {"sha256": 32, "sha1": 20}
+
+# One "key=value" part of a comma-separated header: the key is everything from the
+# start of the part up to its first "=", so "v1.sha256=..." keeps key "v1.sha256"
+_SIG_KV_RE = re.compile(r"(?:^|,)([^,=]*)=([^,]*)")
 
 def _parse_sig_header(sig_value: str) -> Dict[str, str]:
     """
@@ -99,12 +143,8 @@ def _parse_sig_header(sig_value: str) -> Dict[str, str]:
       - "HEX"                                    (raw hex)
     Returns a dict, e.g. {"t": "...", "v1": "..."} or {"sha256": "..."} or {"raw": "..."}.
     """
-    parts = [p.strip() for p in sig_value.split(",") if p.strip()]
-    kv = {}
-    for p in parts:
-        if "=" in p:
-            k, v = p.split("=", 1)
-            kv[k.strip().lower()] = v.strip()
+    # One pass of the compiled regex over "k=v,k=v" (no split/strip per part)
+    kv = {m.group(1).strip().lower(): m.group(2).strip() for m in _SIG_KV_RE.finditer(sig_value)}
     if not kv:
         kv["raw"] = sig_value.strip()
     return kv
@@ -123,18 +163,23 @@ def verify_signature(
     Returns details dict (including which header matched).
     Raises WebhookVerificationError on failure (unless skip_verification=True).
 
+    `payload` should be the raw request body bytes as received; bytes are
+    hashed without a copy, str is UTF-8 encoded first (fallback only).
+
     DEV NOTE:
       - If `secret` is None/empty and skip_verification=False -> raise.
       - If `skip_verification=True`, we log and return without checking.
     """
-    dprint("webhooks.verify_signature() start", {
-        "skip_verification": skip_verification,
-        "header_name_override": bool(header_name),
-        "tolerance_s": tolerance_s,
-    })
+    if _debug.DEBUG_ENABLED:
+        dprint("webhooks.verify_signature() start", {
+            "skip_verification": skip_verification,
+            "header_name_override": bool(header_name),
+            "tolerance_s": tolerance_s,
+        })
 
     if skip_verification:
-        dprint("webhooks.verify_signature() skipped (dev mode)")
+        if _debug.DEBUG_ENABLED:
+            dprint("webhooks.verify_signature() skipped (dev mode)")
         return {"skipped": True}
 
     if not secret:
@@ -142,25 +187,29 @@ def verify_signature(
 
     # Find signature header
     sig_value, found_name = _find_sig_header(headers, header_name)
-    dprint("webhooks.verify_signature() header found", {"header": found_name, "value_len": len(sig_value)})
+    if _debug.DEBUG_ENABLED:
+        dprint(
+            "webhooks.verify_signature() header found",
+            {"header": found_name, "value_len": len(sig_value)},
+        )
 
-    # Normalize payload for hashing
-    if isinstance(payload, (bytes, bytearray)):
-        body_bytes = bytes(payload)
-    else:
-        body_bytes = payload.encode("utf-8")
+    # Normalize payload for hashing (bytes/bytearray are hashed as-is; only str is encoded)
+    body_bytes = payload.encode("utf-8") if isinstance(payload, str) else payload
 
     # Parse header
     parsed = _parse_sig_header(sig_value)
-    djson("webhooks.verify_signature() parsed header", parsed)
+    if _debug.DEBUG_ENABLED:
+        djson("webhooks.verify_signature() parsed header", parsed)
 
     ok = False
     reason = "no_match"
+    algo: Optional[str] = None
+    sig_hex = ""
+    prefix = b""
 
     # Case 1: timestamped (t=..., v1=...) - assume v1 is SHA-256 HMAC of "t.<body>"
     if "t" in parsed and "v1" in parsed:
         t_val = parsed["t"]
-        sig_hex = parsed["v1"]
         try:
             ts = int(t_val)
             now = int(time.time())
@@ -169,41 +218,53 @@ def verify_signature(
 
         # Enforce tolerance first
         if abs(now - ts) > int(tolerance_s):
-            dprint("webhooks.verify_signature() timestamp out of tolerance", {"now": now, "ts": ts})
+            if _debug.DEBUG_ENABLED:
+                dprint(
+                    "webhooks.verify_signature() timestamp out of tolerance",
+                    {"now": now, "ts": ts},
+                )
             raise WebhookVerificationError("signature verification failed: timestamp_out_of_tolerance")
 
         # canonical message is "<timestamp>.<body>"
-        signed_payload = f"{t_val}.".encode("utf-8") + body_bytes
-        comp = _hmac_hex(secret, signed_payload, "sha256")
-        ok = _cmp(comp, sig_hex)
-        if not ok:
-            reason = "mismatch"
+        algo, sig_hex = "sha256", parsed["v1"]
+        prefix = f"{t_val}.".encode()
 
     # Case 2: sha256=... (GitHub-like)
     elif "sha256" in parsed:
-        comp = _hmac_hex(secret, body_bytes, "sha256")
-        ok = _cmp(comp, parsed["sha256"])
-        if not ok:
-            reason = "mismatch"
+        algo, sig_hex = "sha256", parsed["sha256"]
 
     # Case 3: sha1=... (rare but supported for flexibility)
     elif "sha1" in parsed:
-        comp = _hmac_hex(secret, body_bytes, "sha1")
-        ok = _cmp(comp, parsed["sha1"])
-        if not ok:
-            reason = "mismatch"
+        algo, sig_hex = "sha1", parsed["sha1"]
 
     # Case 4: raw hex in header
     elif "raw" in parsed:
-        comp = _hmac_hex(secret, body_bytes, "sha256")
-        ok = _cmp(comp, parsed["raw"])
-        if not ok:
-            reason = "mismatch"
+        algo, sig_hex = "sha256", parsed["raw"]
 
     else:
         reason = "unsupported_header_format"
 
-    dprint("webhooks.verify_signature() result", {"ok": ok, "reason": reason, "header": found_name})
+    if algo is not None:
+        # Compare raw digests (half the bytes of the hex forms); header hex may be any case
+        try:
+            expected = bytes.fromhex(sig_hex)
+        except ValueError:
+            reason = "malformed_hex"
+        else:
+            if len(expected) != _DIGEST_SIZES[algo]:
+                # Wrong-length signatures can never match; skip hashing the body
+                reason = "bad_length"
+            else:
+                digest = _hmac_digest(secret, body_bytes, algo, prefix=prefix)
+                ok = hmac.compare_digest(digest, expected)
+                if not ok:
+                    reason = "mismatch"
+
+    if _debug.DEBUG_ENABLED:
+        dprint(
+            "webhooks.verify_signature() result",
+            {"ok": ok, "reason": reason, "header": found_name},
+        )
     if not ok:
         raise WebhookVerificationError(f"signature verification failed: {reason}")
 
@@ -214,6 +275,36 @@ def verify_signature(
 # Parsing & dispatch
 # ------------------------
 
+def _decode_event(body: _Payload) -> WebhookEvent:
+    """Decode a (verified or deliberately unverified) body into a WebhookEvent."""
+    # Decode JSON (orjson reads bytes directly when installed)
+    try:
+        payload = _json.loads(body) if body else {}
+    except Exception as e:
+        raise WebhookVerificationError(f"invalid JSON body: {e}") from e
+
+    if _debug.DEBUG_ENABLED:
+        djson("webhooks.parse_event() payload", payload)
+
+    # Lift common fields if present
+    fields = dict(
+        id=payload.get("id"),
+        type=payload.get("type") or payload.get("event") or payload.get("event_type"),
+        resource_type=payload.get("resourceType") or payload.get("resource_type"),
+        created_on=payload.get("createdOn") or payload.get("created_on"),
+        created=payload.get("created"),
+        mode=payload.get("mode"),
+    )
+    if all(v is None or type(v) is str for v in fields.values()):
+        # Already the field types validation would produce; skip the validator chain
+        ev = WebhookEvent.model_construct(data=payload, **fields)
+    else:
+        # Anything else (e.g. a numeric id) gets the usual pydantic ValidationError
+        ev = WebhookEvent(data=payload, **fields)
+    djson("webhooks.parse_event() event", lambda: ev.model_dump(mode="json"))
+    return ev
+
+
 def parse_event(
     *,
     body: Union[str, bytes, bytearray],
@@ -227,7 +318,7 @@ def parse_event(
     Parse and (optionally) verify a Univapay webhook.
 
     Args:
-      body: raw request body (bytes/str).
+      body: raw request body; bytes preferred (str is encoded for verification).
       headers: incoming HTTP headers (case-insensitive handling).
       secret: your webhook signing secret (None + skip_verification=True for dev).
       header_name: force a specific signature header name (optional).
@@ -237,10 +328,11 @@ def parse_event(
     Returns:
       WebhookEvent
     """
-    dprint("webhooks.parse_event() begin", {
-        "skip_verification": skip_verification,
-        "header_override": header_name,
-    })
+    if _debug.DEBUG_ENABLED:
+        dprint("webhooks.parse_event() begin", {
+            "skip_verification": skip_verification,
+            "header_override": header_name,
+        })
 
     # Verify signature first (unless skipped)
     verify_signature(
@@ -252,31 +344,7 @@ def parse_event(
         skip_verification=skip_verification,
     )
 
-    # Decode JSON
-    if isinstance(body, (bytes, bytearray)):
-        raw_text = body.decode("utf-8", errors="replace")
-    else:
-        raw_text = body
-
-    try:
-        payload = json.loads(raw_text) if raw_text else {}
-    except Exception as e:
-        raise WebhookVerificationError(f"invalid JSON body: {e}") from e
-
-    djson("webhooks.parse_event() payload", payload)
-
-    # Lift common fields if present
-    ev = WebhookEvent(
-        id=payload.get("id"),
-        type=payload.get("type") or payload.get("event") or payload.get("event_type"),
-        resource_type=payload.get("resourceType") or payload.get("resource_type"),
-        created_on=payload.get("createdOn") or payload.get("created_on"),
-        created=payload.get("created"),
-        mode=payload.get("mode"),
-        data=payload,
-    )
-    djson("webhooks.parse_event() event", ev.model_dump(mode="json"))
-    return ev
+    return _decode_event(body)
 
 
 def verify_and_parse(
@@ -289,7 +357,8 @@ def verify_and_parse(
     skip_verification: bool = False,
 ) -> Tuple[Dict[str, Any], WebhookEvent]:
     """
-    Convenience: verify_signature(...) + parse_event(...)
+    Convenience: verify_signature(...) + parse_event(...) in a single pass
+    (the signature is checked once and the body decoded once).
 
     Returns:
       (verify_info_dict, WebhookEvent)
@@ -302,14 +371,7 @@ def verify_and_parse(
         tolerance_s=tolerance_s,
         skip_verification=skip_verification,
     )
-    event = parse_event(
-        body=body,
-        headers=headers,
-        secret=secret,
-        header_name=header_name,
-        tolerance_s=tolerance_s,
-        skip_verification=True,  # already verified above
-    )
+    event = _decode_event(body)  # already verified above
     return info, event
 
 
@@ -331,9 +393,22 @@ class WebhookRouter:
 
         info, event = verify_and_parse(body=..., headers=..., secret=...)
         results = router.dispatch(event)
+
+    With `dedupe_size=N`, the router remembers the last N event ids and
+    `dispatch` returns [] for redelivered events instead of running handlers
+    again (in-process only; use a shared store across workers). An event whose
+    handlers raised or returned an exception is forgotten, so its redelivery runs.
     """
-    def __init__(self) -> None:
+    __slots__ = ("_map", "_compiled", "_dedupe_size", "_seen", "_seen_lock")
+
+    def __init__(self, *, dedupe_size: int = 0) -> None:
         self._map: Dict[str, List[Handler]] = {}
+        # event type -> (type handlers + wildcard handlers); rebuilt after on()/add()
+        self._compiled: Dict[Optional[str], Tuple[Handler, ...]] = {}
+        # Insertion-ordered window of seen event ids; oldest evicted one at a time
+        self._dedupe_size = max(0, int(dedupe_size))
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._seen_lock = threading.Lock()
 
     def on(self, event_type: str) -> Callable[[Handler], Handler]:
         if not event_type or not isinstance(event_type, str):
@@ -341,31 +416,85 @@ class WebhookRouter:
 
         def _decorator(func: Handler) -> Handler:
             self._map.setdefault(event_type, []).append(func)
-            dprint("webhooks.router.on()", {"event_type": event_type, "handler": getattr(func, "__name__", "handler")})
+            self._compiled.clear()
+            if _debug.DEBUG_ENABLED:
+                dprint(
+                    "webhooks.router.on()",
+                    {"event_type": event_type, "handler": getattr(func, "__name__", "handler")},
+                )
             return func
 
         return _decorator
 
     def add(self, event_type: str, func: Handler) -> None:
         self._map.setdefault(event_type, []).append(func)
-        dprint("webhooks.router.add()", {"event_type": event_type, "handler": getattr(func, "__name__", "handler")})
+        self._compiled.clear()
+        if _debug.DEBUG_ENABLED:
+            dprint(
+                "webhooks.router.add()",
+                {"event_type": event_type, "handler": getattr(func, "__name__", "handler")},
+            )
+
+    def handlers_for(self, event_type: Optional[str]) -> Tuple[Handler, ...]:
+        # Unregistered/missing types share the wildcard-only entry, so the cache
+        # stays bounded by the registered types
+        key = event_type if event_type and event_type in self._map else None
+        handlers = self._compiled.get(key)
+        if handlers is None:
+            if key is None:
+                # no (registered) type => only wildcard
+                handlers = tuple(self._map.get("*", ()))
+            else:
+                handlers = (*self._map[key], *self._map.get("*", ()))
+            self._compiled[key] = handlers
+        return handlers
+
+    def is_duplicate(self, event_id: Optional[str]) -> bool:
+        """
+        Record `event_id` and return True if it is already in the dedupe window.
+        Always False when dedupe is off (dedupe_size=0) or the id is missing.
+        """
+        if not self._dedupe_size or not event_id:
+            return False
+        seen = self._seen
+        with self._seen_lock:
+            if event_id in seen:
+                seen.move_to_end(event_id)
+                return True
+            seen[event_id] = None
+            if len(seen) > self._dedupe_size:
+                seen.popitem(last=False)
+        return False
 
-    def handlers_for(self, event_type: Optional[str]) -> Iterable[Handler]:
-        if not event_type:
-            # no type => only wildcard
-            return self._map.get("*", [])
-        return [*self._map.get(event_type, []), *self._map.get("*", [])]
+    def _forget(self, event_id: Optional[str]) -> None:
+        # Drop an id from the window so a redelivery of a failed event runs again
+        if not self._dedupe_size or not event_id:
+            return
+        with self._seen_lock:
+            self._seen.pop(event_id, None)
 
     def dispatch(self, event: WebhookEvent) -> List[Any]:
-        dprint("webhooks.router.dispatch()", {"type": event.type})
-        out: List[Any] = []
-        for fn in self.handlers_for(event.type):
+        if _debug.DEBUG_ENABLED:
+            dprint("webhooks.router.dispatch()", {"type": event.type})
+        if self.is_duplicate(event.id):
+            if _debug.DEBUG_ENABLED:
+                dprint("webhooks.router duplicate event skipped", {"id": event.id})
+            return []
+        handlers = self.handlers_for(event.type)
+        out: List[Any] = [None] * len(handlers)  # sized once; filled by index
+        for i, fn in enumerate(handlers):
             try:
-                res = fn(event)
-                out.append(res)
+                out[i] = fn(event)
             except Exception as e:
-                dprint("webhooks.router handler error", {"handler": getattr(fn, "__name__", "handler"), "error": repr(e)})
-                out.append(e)
+                if _debug.DEBUG_ENABLED:
+                    dprint(
+                        "webhooks.router handler error",
+                        {"handler": getattr(fn, "__name__", "handler"), "error": repr(e)},
+                    )
+                out[i] = e
+        if any(isinstance(r, BaseException) for r in out):
+            # A handler failed (raised or returned an error): let the provider's retry through
+            self._forget(event.id)
         return out
 
 
@@ -1,8 +1,13 @@
 from __future__ import annotations
+import secrets
+import sys
+import time
 import uuid
-from decimal import Decimal, ROUND_HALF_UP, InvalidOperation, localcontext
-from typing import Any, Dict, Mapping, Optional
+from functools import lru_cache
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation, getcontext
+from typing import Any, Dict, Mapping, Optional, Tuple
 
+from . import debug as _debug
 from .debug import dprint, djson
 
 # ==============================================================================
@@ -23,6 +28,13 @@ _CURRENCY_EXPONENTS: Dict[str, int] = {
 }
 
 
+# Scale factors per exponent, built once (Decimal(10) ** exp / Decimal(1).scaleb(-exp))
+_EXPONENTS = frozenset(_CURRENCY_EXPONENTS.values()) | {2}
+_POW10: Dict[int, Decimal] = {e: Decimal(10) ** e for e in _EXPONENTS}
+_QUANT: Dict[int, Decimal] = {e: Decimal(1).scaleb(-e) for e in _EXPONENTS}
+_INT_POW10: Dict[int, int] = {e: 10 ** e for e in _EXPONENTS}
+
+
 def normalize_currency(code: str) -> str:
     """
     Normalize an ISO currency code to lowercase.
@@ -30,17 +42,28 @@ def normalize_currency(code: str) -> str:
     if not isinstance(code, str) or not code.strip():
         raise ValueError("currency code must be a non-empty string")
     c = code.strip().lower()
-    dprint("utils.normalize_currency()", {"input": code, "normalized": c})
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.normalize_currency()", {"input": code, "normalized": c})
     return c
 
 
+@lru_cache(maxsize=256)
+def _norm_and_exp(code: str) -> Tuple[str, int]:
+    # Callers pass the same few codes over and over; normalize each spelling once
+    c = sys.intern(normalize_currency(code))
+    return c, _CURRENCY_EXPONENTS.get(c, 2)
+
+
 def currency_exponent(code: str) -> int:
     """
     Return the minor-unit exponent for a currency (default 2).
     """
-    c = normalize_currency(code)
-    exp = _CURRENCY_EXPONENTS.get(c, 2)
-    dprint("utils.currency_exponent()", {"currency": c, "exponent": exp})
+    if not isinstance(code, str):
+        # raises the usual ValueError (and keeps lru_cache off unhashables)
+        normalize_currency(code)
+    c, exp = _norm_and_exp(code)
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.currency_exponent()", {"currency": c, "exponent": exp})
     return exp
 
 
@@ -80,13 +103,21 @@ def quantize_major(amount: Decimal | str | int | float, currency: str) -> Decima
     """
     exp = currency_exponent(currency)
     dec = _to_decimal(amount)
-    with localcontext() as ctx:
-        ctx.rounding = ROUND_HALF_UP
-        if exp == 0:
-            return dec.to_integral_value(rounding=ROUND_HALF_UP)
-        # quantize to N decimal places (e.g., 2 -> '0.01', 3 -> '0.001')
-        q = Decimal(1).scaleb(-exp)     # == Decimal('1e-<exp>')
-        return dec.quantize(q, rounding=ROUND_HALF_UP)
+    # Rounding is passed explicitly, so no localcontext() is needed
+    if exp == 0:
+        return dec.to_integral_value(rounding=ROUND_HALF_UP)
+    # quantize to N decimal places (e.g., 2 -> '0.01', 3 -> '0.001')
+    return dec.quantize(_QUANT[exp], rounding=ROUND_HALF_UP)
+
+
+def _exact_scale(amount: Decimal, exp: int) -> bool:
+    # True when amount * 10**exp is an integer computed without any rounding
+    t = amount.as_tuple()
+    return (
+        isinstance(t.exponent, int)  # finite (NaN/Infinity use 'n'/'N'/'F')
+        and t.exponent >= -exp
+        and len(t.digits) + exp <= getcontext().prec
+    )
 
 
 def to_minor_units(amount: Decimal | str | int | float, currency: str) -> int:
@@ -97,18 +128,29 @@ def to_minor_units(amount: Decimal | str | int | float, currency: str) -> int:
     NOTE: This assumes the input represents MAJOR units.
     """
     exp = currency_exponent(currency)
-    dprint("utils.to_minor_units()", {"amount_in": str(amount), "currency": currency, "exp": exp})
+    if _debug.DEBUG_ENABLED:
+        dprint(
+            "utils.to_minor_units()",
+            {"amount_in": str(amount), "currency": currency, "exp": exp},
+        )
 
-    dec = quantize_major(amount, currency)  # ensure correct scale before multiplying
-    with localcontext() as ctx:
-        ctx.rounding = ROUND_HALF_UP
-        scaled = dec * (Decimal(10) ** exp)
+    if isinstance(amount, int):
+        # Whole major units: plain integer scaling, no Decimal round trip
+        minor = amount * _INT_POW10[exp]
+    elif isinstance(amount, Decimal) and _exact_scale(amount, exp):
+        # Already at (or coarser than) the currency scale and short enough that
+        # the product fits the context precision, so nothing is rounded
+        minor = int(amount * _POW10[exp])
+    else:
+        dec = quantize_major(amount, currency)  # ensure correct scale before multiplying
+        scaled = dec * _POW10[exp]  # exact: dec already has at most `exp` decimals
         try:
             minor = int(scaled.to_integral_value(rounding=ROUND_HALF_UP))
         except Exception as e:
             raise ValueError(f"Cannot convert amount {amount!r} to minor units") from e
 
-    dprint("utils.to_minor_units() ->", {"minor_out": minor})
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.to_minor_units() ->", {"minor_out": minor})
     return minor
 
 
@@ -119,14 +161,14 @@ def from_minor_units(minor: int, currency: str) -> Decimal:
     if not isinstance(minor, int):
         raise TypeError("minor must be an int")
     exp = currency_exponent(currency)
-    dprint("utils.from_minor_units()", {"minor_in": minor, "currency": currency, "exp": exp})
-    with localcontext() as ctx:
-        ctx.rounding = ROUND_HALF_UP
-        if exp == 0:
-            major = Decimal(minor)
-        else:
-            major = (Decimal(minor) / (Decimal(10) ** exp)).quantize(Decimal(1).scaleb(-exp), rounding=ROUND_HALF_UP)
-    dprint("utils.from_minor_units() ->", {"major_out": str(major)})
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.from_minor_units()", {"minor_in": minor, "currency": currency, "exp": exp})
+    # Built from the digit tuple: exact at any size (scaleb/division would round to
+    # the context precision) and already on the currency scale
+    t = Decimal(minor).as_tuple()
+    major = Decimal((t.sign, t.digits, -exp))
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.from_minor_units() ->", {"major_out": str(major)})
     return major
 
 
@@ -162,12 +204,17 @@ def make_idempotency_key(prefix: Optional[str] = "unipysdk") -> str:
     """
     Generate a safe Idempotency-Key string. Length kept < 64 chars.
     """
-    base = (prefix or "unipysdk").strip() or "unipysdk"
-    key = f"{base}_{uuid.uuid4().hex}"
-    # Cap length conservatively
-    if len(key) > 64:
-        key = key[:64]
-    dprint("utils.make_idempotency_key()", {"key": key})
+    if prefix is None or prefix == "unipysdk":
+        # Default prefix: 41 chars, always under the cap
+        key = "unipysdk_" + secrets.token_hex(16)  # same 128 bits as uuid4().hex, no UUID object
+    else:
+        base = (prefix or "unipysdk").strip() or "unipysdk"
+        key = f"{base}_{secrets.token_hex(16)}"
+        # Cap length conservatively
+        if len(key) > 64:
+            key = key[:64]
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.make_idempotency_key()", {"key": key})
     return key
 
 
@@ -177,14 +224,16 @@ def ensure_idempotency_key(existing: Optional[str], prefix: Optional[str] = "uni
     """
     if isinstance(existing, str) and existing.strip():
         k = existing.strip()
-        dprint("utils.ensure_idempotency_key()", {"existing": k})
+        if _debug.DEBUG_ENABLED:
+            dprint("utils.ensure_idempotency_key()", {"existing": k})
         return k
     return make_idempotency_key(prefix=prefix)
 
 
 def uuid_str() -> str:
     u = uuid.uuid4().hex
-    dprint("utils.uuid_str()", {"uuid": u})
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.uuid_str()", {"uuid": u})
     return u
 
 
@@ -192,9 +241,9 @@ def utcnow_iso() -> str:
     """
     ISO8601 UTC timestamp (seconds precision), e.g. '2025-09-13T12:34:56Z'.
     """
-    from datetime import datetime, timezone
-    ts = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
-    dprint("utils.utcnow_iso()", {"ts": ts})
+    ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())  # no datetime/tzinfo objects
+    if _debug.DEBUG_ENABLED:
+        dprint("utils.utcnow_iso()", {"ts": ts})
     return ts
 
 
@@ -226,8 +275,13 @@ def safe_metadata(md: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
     md = md or {}
     if not isinstance(md, Mapping):
         raise TypeError("metadata must be a mapping")
-    out = {str(k): _to_json_safe(v) for k, v in md.items()}
-    djson("utils.safe_metadata()", out)
+    # Common case: flat str -> primitive mapping; a shallow copy is already JSON-safe
+    if all(type(k) is str and isinstance(v, _JSON_PRIMITIVES) for k, v in md.items()):
+        out = dict(md)
+    else:
+        out = {str(k): _to_json_safe(v) for k, v in md.items()}
+    if _debug.DEBUG_ENABLED:
+        djson("utils.safe_metadata()", out)
     return out
 
 
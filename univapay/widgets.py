@@ -1,28 +1,26 @@
 # univapay/widgets.py
 from __future__ import annotations
 import os
-import json
+from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Any, Dict, Mapping, Optional, Tuple, List
 
-# Optional .env loading (safe if missing)
-try:
-    from dotenv import load_dotenv  # type: ignore
-    load_dotenv()
-except Exception:
-    pass
-
+from . import _json
+from . import debug as _debug
 from .debug import dprint, djson  # unified SDK debug printers
 
+# .env (python-dotenv, if installed) is loaded once by univapay.config on package import
+
 
 # =========================== helpers: env & masking ===========================
 
 def _mask_token(token: Optional[str]) -> str:
+    # Only called under the debug gate, with app ids already stripped by _require_env_app_id
     if not token:
         return "(missing)"
-    t = token.strip()
-    if len(t) <= 10:
+    if len(token) <= 10:
         return "***"
-    return f"{t[:6]}...{t[-4:]}"
+    return token[:6] + "..." + token[-4:]
 
 
 def _require_env_app_id(jwt: Optional[str] = None, env: Mapping[str, str] | None = None) -> str:
@@ -33,9 +31,11 @@ def _require_env_app_id(jwt: Optional[str] = None, env: Mapping[str, str] | None
     env = env or os.environ
     val = (jwt or "").strip() or env.get("UNIVAPAY_JWT", "").strip()
     if not val:
-        dprint("widgets: no UNIVAPAY_JWT found in args/env")
+        if _debug.DEBUG_ENABLED:
+            dprint("widgets: no UNIVAPAY_JWT found in args/env")
         raise RuntimeError("UNIVAPAY_JWT not set and no jwt provided.")
-    dprint("widgets: appId resolved", {"appId": _mask_token(val)})
+    if _debug.DEBUG_ENABLED:
+        dprint("widgets: appId resolved", {"appId": _mask_token(val)})
     return val
 
 
@@ -46,12 +46,15 @@ def _validate_amount(amount: int) -> None:
         raise ValueError("amount must be a positive integer (minor units, e.g., JPY).")
 
 
-def _validate_id(name: str, value: str) -> None:
-    if not isinstance(value, str) or not value.strip():
+def _validate_id(name: str, value: str) -> str:
+    # Returns the stripped value so callers don't strip again
+    s = value.strip() if isinstance(value, str) else ""
+    if not s:
         raise ValueError(f"{name} is required and must be a non-empty string.")
+    return s
 
 
-_VALID_PERIODS = {
+_VALID_PERIODS = frozenset((
     "daily",
     "weekly",
     "biweekly",
@@ -61,65 +64,67 @@ _VALID_PERIODS = {
     "semiannually",
     "annually",
     "yearly",
+))
+
+# Every accepted spelling (after strip/lower/space removal) -> canonical period,
+# with yearly -> annually already folded in, so validation is one dict lookup
+_PERIOD_CANONICAL: Dict[str, str] = {
+    **{p: p for p in _VALID_PERIODS},
+    "year": "annually",
+    "yearly": "annually",
+    "annual": "annually",
+    "bi-weekly": "biweekly",
+    "bi-monthly": "bimonthly",
+    "semiannual": "semiannually",
+    "semi-annual": "semiannually",
 }
+_PERIOD_ERROR = f"period must be one of {sorted(_VALID_PERIODS)}"
+
+
 def _validate_period(period: str) -> str:
     if not isinstance(period, str) or not period.strip():
         raise ValueError("period is required, e.g., 'monthly' or 'semiannually'.")
-    raw = period.strip().lower().replace(" ", "")
-    alias_map = {
-        "year": "annually",
-        "yearly": "annually",
-        "annual": "annually",
-        "annually": "annually",
-        "biweekly": "biweekly",
-        "bi-weekly": "biweekly",
-        "bimonthly": "bimonthly",
-        "bi-monthly": "bimonthly",
-        "semiannual": "semiannually",
-        "semi-annual": "semiannually",
-    }
-    p = alias_map.get(raw, raw)
-    if p not in _VALID_PERIODS:
-        raise ValueError(f"period must be one of {sorted(_VALID_PERIODS)}")
-    if p == "yearly":
-        p = "annually"
+    p = _PERIOD_CANONICAL.get(period.strip().lower().replace(" ", ""))
+    if p is None:
+        raise ValueError(_PERIOD_ERROR)
     return p
 
 
 # =========================== helpers: base defaults ===========================
 
+# FE-safe defaults, built once; each call returns a fresh merged dict
+_BASE_DEFAULTS: Mapping[str, Any] = MappingProxyType({
+    "currency": "jpy",
+    "locale": "auto",
+    "cvvAuthorize": True,   # enables CVV authorize pass-through for recurring cards
+})
+_CALLBACK_DEFAULTS: Mapping[str, Any] = MappingProxyType({
+    "enabled": True,
+    "logLevel": "info",
+})
+_API_ENDPOINT_DEFAULTS: Mapping[str, str] = MappingProxyType({
+    "config": "/widget-config",
+    "webhook": "/webhook/univapay",
+})
+
+
 def _normalize_base_config(base_config: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
     """
     FE-safe defaults; caller can override via base_config.
     """
-    merged = {
-        "currency": "jpy",
-        "locale": "auto",
-        "cvvAuthorize": True,   # enables CVV authorize pass-through for recurring cards
-    }
-    if base_config:
-        merged.update(dict(base_config))
-    return merged
+    return {**_BASE_DEFAULTS, **base_config} if base_config else dict(_BASE_DEFAULTS)
 
 
 def _normalize_callbacks(callbacks: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
-    merged = {
-        "enabled": True,
-        "logLevel": "info",
-    }
-    if callbacks:
-        merged.update(dict(callbacks))
-    return merged
+    return {**_CALLBACK_DEFAULTS, **callbacks} if callbacks else dict(_CALLBACK_DEFAULTS)
 
 
 def _normalize_api(api: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
-    merged = {
-        "baseUrl": "/api",
-        "endpoints": {"config": "/widget-config", "webhook": "/webhook/univapay"},
-    }
-    if api:
-        merged.update(dict(api))
-    return merged
+    # Endpoints are copied per call so callers can't mutate the shared defaults,
+    # unless the override replaces them anyway (None only holds the key's position)
+    if api and "endpoints" in api:
+        return {"baseUrl": "/api", "endpoints": None, **api}
+    return {"baseUrl": "/api", "endpoints": dict(_API_ENDPOINT_DEFAULTS), **(api or {})}
 
 
 # ====================== helpers: payment method toggles =======================
@@ -144,6 +149,15 @@ _KONBINI_BRANDS = {
 }
 _BANK_TRANSFER_BRANDS = {"aozora_bank"}  # current documented brand
 
+_SCALAR_METHOD_KEYS = frozenset({"card", "paidy", "qr"})
+_CATEGORY_BRANDS: Dict[str, frozenset] = {
+    "online": frozenset(_ONLINE_BRANDS),
+    "konbini": frozenset(_KONBINI_BRANDS),
+    "bank_transfer": frozenset(_BANK_TRANSFER_BRANDS),
+}
+# debug wording
+_CATEGORY_LABELS = {"online": "online", "konbini": "konbini", "bank_transfer": "bank"}
+
 def _normalize_payment_methods(payment_methods: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
     """
     Input is a nested dict of booleans like:
@@ -162,41 +176,20 @@ def _normalize_payment_methods(payment_methods: Optional[Mapping[str, Any]]) ->
 
     out: Dict[str, Any] = {}
     for key, value in payment_methods.items():
-        if key == "card":
-            out["card"] = bool(value)
-        elif key == "paidy":
-            out["paidy"] = bool(value)
-        elif key == "qr":
-            # Allow QR channel toggle passthrough if FE supports it
-            out["qr"] = bool(value)
-        elif key == "online":
-            brands = {}
-            if isinstance(value, Mapping):
-                for b, on in value.items():
-                    if b in _ONLINE_BRANDS:
-                        brands[b] = bool(on)
-                    else:
-                        dprint("widgets: ignoring unknown online brand", {"brand": b})
-            out["online"] = brands
-        elif key == "konbini":
-            brands = {}
+        if key in _SCALAR_METHOD_KEYS:
+            out[key] = bool(value)  # "qr": allow QR channel toggle passthrough if FE supports it
+        elif key in _CATEGORY_BRANDS:
+            allowed = _CATEGORY_BRANDS[key]
             if isinstance(value, Mapping):
-                for b, on in value.items():
-                    if b in _KONBINI_BRANDS:
-                        brands[b] = bool(on)
-                    else:
-                        dprint("widgets: ignoring unknown konbini brand", {"brand": b})
-            out["konbini"] = brands
-        elif key == "bank_transfer":
-            brands = {}
-            if isinstance(value, Mapping):
-                for b, on in value.items():
-                    if b in _BANK_TRANSFER_BRANDS:
-                        brands[b] = bool(on)
-                    else:
-                        dprint("widgets: ignoring unknown bank brand", {"brand": b})
-            out["bank_transfer"] = brands
-        else:
+                # Iterate the input (not the allowed set) so brand order is preserved
+                out[key] = {b: bool(on) for b, on in value.items() if b in allowed}
+                if _debug.DEBUG_ENABLED:
+                    for b in value.keys() - allowed:
+                        label = _CATEGORY_LABELS[key]
+                        dprint(f"widgets: ignoring unknown {label} brand", {"brand": b})
+            else:
+                out[key] = {}
+        elif _debug.DEBUG_ENABLED:
             dprint("widgets: ignoring unknown method key", {"key": key})
     return out
 
@@ -207,6 +200,8 @@ def _warn_incompatible(widget_kind: str, methods: Dict[str, Any]) -> None:
     - subscription: primarily card; online/konbini/bank_transfer/paidy typically not used here
     - recurring: card only (tokenize & merchant-initiated charges)
     """
+    if not _debug.DEBUG_ENABLED:
+        return  # notes only; nothing to do with debug off
     kind = widget_kind.lower()
     if kind == "subscription":
         for k in ("online", "konbini", "bank_transfer", "paidy"):
@@ -220,30 +215,64 @@ def _warn_incompatible(widget_kind: str, methods: Dict[str, Any]) -> None:
                        {"method": k, "advice": "recurring is typically card"})
 
 
-# ============================ envelope (single) ===============================
+# ============================ shared context ==================================
 
-def _envelope_single(
+@dataclass(frozen=True)
+class WidgetContext:
+    """
+    Resolved appId + normalized baseConfig/callbacks/api, reusable across builders.
+    Envelopes built from one context share these dicts, so treat them as read-only.
+    """
+    app_id: str
+    base_config: Dict[str, Any]
+    callbacks: Dict[str, Any]
+    api: Dict[str, Any]
+
+
+def prepare_widget_context(
     *,
-    app_id: str,
-    widget_key: str,
-    widget: Mapping[str, Any],
+    app_jwt: Optional[str] = None,
+    env: Mapping[str, str] | None = None,
     base_config: Optional[Mapping[str, Any]] = None,
     callbacks: Optional[Mapping[str, Any]] = None,
     api: Optional[Mapping[str, Any]] = None,
+) -> WidgetContext:
+    """
+    Resolve the FE app token and normalize the shared sections once, e.g. when
+    rendering several widgets for one page:
+
+      ctx = prepare_widget_context(base_config={"locale": "ja"})
+      one = build_one_time_widget_config(..., ctx=ctx)
+      sub = build_subscription_widget_config(..., ctx=ctx)
+    """
+    return WidgetContext(
+        app_id=_require_env_app_id(app_jwt, env),
+        base_config=_normalize_base_config(base_config),
+        callbacks=_normalize_callbacks(callbacks),
+        api=_normalize_api(api),
+    )
+
+
+# ============================ envelope (single) ===============================
+
+def _envelope_single(
+    *, ctx: WidgetContext, widget_key: str, widget: Mapping[str, Any]
 ) -> Dict[str, Any]:
     """
     Build a FE-safe JSON envelope containing a single widget config.
     Do NOT include secrets. Only the FE app token (JWT) is exposed.
+    A plain dict `widget` is embedded as-is (not copied).
     """
     payload = {
-        "appId": app_id,
-        "baseConfig": _normalize_base_config(base_config),
-        "widgets": {widget_key: dict(widget)},
-        "callbacks": _normalize_callbacks(callbacks),
-        "api": _normalize_api(api),
+        "appId": ctx.app_id,
+        "baseConfig": ctx.base_config,
+        "widgets": {widget_key: widget if type(widget) is dict else dict(widget)},
+        "callbacks": ctx.callbacks,
+        "api": ctx.api,
     }
-    dprint("widgets: envelope built", {"widget_key": widget_key})
-    djson("widgets.envelope", {**payload, "appId": _mask_token(app_id)})
+    if _debug.DEBUG_ENABLED:
+        dprint("widgets: envelope built", {"widget_key": widget_key})
+        djson("widgets.envelope", {**payload, "appId": _mask_token(ctx.app_id)})
     return payload
 
 
@@ -257,6 +286,7 @@ def build_widget_bundle_envelope(
     base_config: Optional[Mapping[str, Any]] = None,
     callbacks: Optional[Mapping[str, Any]] = None,
     api: Optional[Mapping[str, Any]] = None,
+    ctx: Optional[WidgetContext] = None,
 ) -> Dict[str, Any]:
     """
     Build a single payload with multiple widgets:
@@ -265,17 +295,23 @@ def build_widget_bundle_envelope(
         "subscriptionSemiannual": {...},
         "recurringVault": {...}
       }
+    Plain dict widgets are embedded without copying; don't mutate them afterwards.
+    With `ctx`, the app_jwt/env/base_config/callbacks/api arguments are ignored.
     """
-    app_id = _require_env_app_id(app_jwt, env)
+    if ctx is None:
+        ctx = prepare_widget_context(
+            app_jwt=app_jwt, env=env, base_config=base_config, callbacks=callbacks, api=api
+        )
     payload = {
-        "appId": app_id,
-        "baseConfig": _normalize_base_config(base_config),
-        "widgets": {k: dict(v) for k, v in widgets.items()},
-        "callbacks": _normalize_callbacks(callbacks),
-        "api": _normalize_api(api),
+        "appId": ctx.app_id,
+        "baseConfig": ctx.base_config,
+        "widgets": {k: v if type(v) is dict else dict(v) for k, v in widgets.items()},
+        "callbacks": ctx.callbacks,
+        "api": ctx.api,
     }
-    dprint("widgets: bundle envelope built", {"count": len(widgets)})
-    djson("widgets.envelope", {**payload, "appId": _mask_token(app_id)})
+    if _debug.DEBUG_ENABLED:
+        dprint("widgets: bundle envelope built", {"count": len(widgets)})
+        djson("widgets.envelope", {**payload, "appId": _mask_token(ctx.app_id)})
     return payload
 
 
@@ -294,39 +330,38 @@ def build_one_time_widget_config(
     callbacks: Optional[Mapping[str, Any]] = None,
     api: Optional[Mapping[str, Any]] = None,
     payment_methods: Optional[Mapping[str, Any]] = None,
+    ctx: Optional[WidgetContext] = None,
     **extra: Any,
 ) -> Dict[str, Any]:
     """
     Build FE config for a ONE-TIME payment widget.
     - Supports enabling/disabling card/paidy/online brands/konbini/bank_transfer via `payment_methods`.
+    - `ctx` (from prepare_widget_context) replaces app_jwt/env/base_config/callbacks/api.
     """
     _validate_amount(amount)
-    _validate_id("form_id", form_id)
-    _validate_id("button_id", button_id)
-    _validate_id("description", description)
-
-    app_id = _require_env_app_id(app_jwt, env)
+    form_id = _validate_id("form_id", form_id)
+    button_id = _validate_id("button_id", button_id)
+    description = _validate_id("description", description)
+
+    if ctx is None:
+        ctx = prepare_widget_context(
+            app_jwt=app_jwt, env=env, base_config=base_config, callbacks=callbacks, api=api
+        )
     methods = _normalize_payment_methods(payment_methods)
     widget = {
         "checkout": "payment",
         "amount": amount,
-        "formId": form_id.strip(),
-        "buttonId": button_id.strip(),
-        "description": description.strip(),
+        "formId": form_id,
+        "buttonId": button_id,
+        "description": description,
         # New: pass method toggles for FE to filter options
         "paymentMethods": methods,
         **extra,
     }
-    dprint("widgets: build_one_time", {"widget_key": widget_key, "amount": amount})
-    djson("widgets.one_time.widget", widget)
-    return _envelope_single(
-        app_id=app_id,
-        widget_key=widget_key,
-        widget=widget,
-        base_config=base_config,
-        callbacks=callbacks,
-        api=api,
-    )
+    if _debug.DEBUG_ENABLED:
+        dprint("widgets: build_one_time", {"widget_key": widget_key, "amount": amount})
+        djson("widgets.one_time.widget", widget)
+    return _envelope_single(ctx=ctx, widget_key=widget_key, widget=widget)
 
 
 def build_subscription_widget_config(
@@ -343,19 +378,24 @@ def build_subscription_widget_config(
     callbacks: Optional[Mapping[str, Any]] = None,
     api: Optional[Mapping[str, Any]] = None,
     payment_methods: Optional[Mapping[str, Any]] = None,
+    ctx: Optional[WidgetContext] = None,
     **extra: Any,
 ) -> Dict[str, Any]:
     """
     Build FE config for a SUBSCRIPTION payment widget.
     - Typically card; other methods will be debug-warned if supplied.
+    - `ctx` (from prepare_widget_context) replaces app_jwt/env/base_config/callbacks/api.
     """
     _validate_amount(amount)
     p = _validate_period(period)
-    _validate_id("form_id", form_id)
-    _validate_id("button_id", button_id)
-    _validate_id("description", description)
-
-    app_id = _require_env_app_id(app_jwt, env)
+    form_id = _validate_id("form_id", form_id)
+    button_id = _validate_id("button_id", button_id)
+    description = _validate_id("description", description)
+
+    if ctx is None:
+        ctx = prepare_widget_context(
+            app_jwt=app_jwt, env=env, base_config=base_config, callbacks=callbacks, api=api
+        )
     methods = _normalize_payment_methods(payment_methods)
     _warn_incompatible("subscription", methods)
 
@@ -364,22 +404,19 @@ def build_subscription_widget_config(
         "tokenType": "subscription",
         "subscriptionPeriod": p,
         "amount": amount,
-        "formId": form_id.strip(),
-        "buttonId": button_id.strip(),
-        "description": description.strip(),
+        "formId": form_id,
+        "buttonId": button_id,
+        "description": description,
         "paymentMethods": methods,
         **extra,
     }
-    dprint("widgets: build_subscription", {"widget_key": widget_key, "amount": amount, "period": p})
-    djson("widgets.subscription.widget", widget)
-    return _envelope_single(
-        app_id=app_id,
-        widget_key=widget_key,
-        widget=widget,
-        base_config=base_config,
-        callbacks=callbacks,
-        api=api,
-    )
+    if _debug.DEBUG_ENABLED:
+        dprint(
+            "widgets: build_subscription",
+            {"widget_key": widget_key, "amount": amount, "period": p},
+        )
+        djson("widgets.subscription.widget", widget)
+    return _envelope_single(ctx=ctx, widget_key=widget_key, widget=widget)
 
 
 def build_recurring_widget_config(
@@ -395,18 +432,23 @@ def build_recurring_widget_config(
     callbacks: Optional[Mapping[str, Any]] = None,
     api: Optional[Mapping[str, Any]] = None,
     payment_methods: Optional[Mapping[str, Any]] = None,
+    ctx: Optional[WidgetContext] = None,
     **extra: Any,
 ) -> Dict[str, Any]:
     """
     Build FE config for a RECURRING payment widget (tokenize card for merchant-initiated charges).
     - Recurring is effectively a card-token flow; other methods will be debug-warned if supplied.
+    - `ctx` (from prepare_widget_context) replaces app_jwt/env/base_config/callbacks/api.
     """
     _validate_amount(amount)
-    _validate_id("form_id", form_id)
-    _validate_id("button_id", button_id)
-    _validate_id("description", description)
-
-    app_id = _require_env_app_id(app_jwt, env)
+    form_id = _validate_id("form_id", form_id)
+    button_id = _validate_id("button_id", button_id)
+    description = _validate_id("description", description)
+
+    if ctx is None:
+        ctx = prepare_widget_context(
+            app_jwt=app_jwt, env=env, base_config=base_config, callbacks=callbacks, api=api
+        )
     methods = _normalize_payment_methods(payment_methods)
     _warn_incompatible("recurring", methods)
 
@@ -414,26 +456,23 @@ def build_recurring_widget_config(
         "checkout": "payment",
         "tokenType": "recurring",
         "amount": amount,
-        "formId": form_id.strip(),
-        "buttonId": button_id.strip(),
-        "description": description.strip(),
+        "formId": form_id,
+        "buttonId": button_id,
+        "description": description,
         "paymentMethods": methods,
         **extra,
     }
-    dprint("widgets: build_recurring", {"widget_key": widget_key, "amount": amount})
-    djson("widgets.recurring.widget", widget)
-    return _envelope_single(
-        app_id=app_id,
-        widget_key=widget_key,
-        widget=widget,
-        base_config=base_config,
-        callbacks=callbacks,
-        api=api,
-    )
+    if _debug.DEBUG_ENABLED:
+        dprint("widgets: build_recurring", {"widget_key": widget_key, "amount": amount})
+        djson("widgets.recurring.widget", widget)
+    return _envelope_single(ctx=ctx, widget_key=widget_key, widget=widget)
 
 
 # ============================ loader URL helper ===============================
 
+DEFAULT_WIDGET_URL = "https://widget.univapay.com/client/checkout.js"
+
+
 def widget_loader_src(env: Mapping[str, str] | None = None) -> str:
     """
     Return the official Univapay widget loader URL, optionally overridden by env.
@@ -442,7 +481,8 @@ def widget_loader_src(env: Mapping[str, str] | None = None) -> str:
     Default: "https://widget.univapay.com/client/checkout.js"
     """
     env = env or os.environ
-    return (env.get("UNIVAPAY_WIDGET_URL") or "https://widget.univapay.com/client/checkout.js").strip()
+    override = env.get("UNIVAPAY_WIDGET_URL")
+    return override.strip() if override else DEFAULT_WIDGET_URL
 
 
 # ============================ JSON convenience ================================
@@ -450,14 +490,12 @@ def widget_loader_src(env: Mapping[str, str] | None = None) -> str:
 def to_json(payload: Dict[str, Any], *, pretty: bool = False) -> str:
     """
     Serialize any widget envelope to JSON (useful in tests or manual output).
+    Values JSON can't represent raise TypeError rather than being stringified;
+    NaN/Infinity are written as-is (NaN, Infinity), as the stdlib encoder does.
     """
-    s = json.dumps(
-        payload,
-        ensure_ascii=False,
-        indent=2 if pretty else None,
-        separators=None if pretty else (",", ":"),
-    )
-    dprint("widgets: to_json length", {"chars": len(s)})
+    s = _json.dumps(payload, pretty=pretty, strict=True, allow_nan=True).decode("utf-8")
+    if _debug.DEBUG_ENABLED:
+        dprint("widgets: to_json length", {"chars": len(s)})
     return s
 
 
@@ -466,6 +504,9 @@ __all__ = [
     "build_subscription_widget_config",
     "build_recurring_widget_config",
     "build_widget_bundle_envelope",
+    "WidgetContext",
+    "prepare_widget_context",
     "widget_loader_src",
+    "DEFAULT_WIDGET_URL",
     "to_json",
 ]